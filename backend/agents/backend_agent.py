@@ -1,5 +1,6 @@
 """Backend Engineer Agent - Generates Flask/Python backend code"""
 from .base_agent import BaseAgent
+from utils.code_parser import parse_code_blocks
 
 BACKEND_SYSTEM_PROMPT = """You are a Backend Engineer generating production-ready Flask APIs.
 
@@ -62,7 +63,7 @@ class BackendAgent(BaseAgent):
             system_prompt=BACKEND_SYSTEM_PROMPT
         )
     
-    def generate_api(self, frontend_requirements, context=None):
+    def generate_api(self, frontend_requirements, context=None, api_key=None):
         """Generate Flask API based on frontend needs"""
         prompt = f"""Generate a complete Flask backend API for this website:
 
@@ -84,23 +85,17 @@ Generate COMPLETE, PRODUCTION-READY Flask code that:
 
 OUTPUT ONLY THE PYTHON CODE, NO EXPLANATIONS."""
         
-        response = self.generate_response(prompt, context)
+        response = self.generate_response(prompt, context, api_key=api_key)
         
         # Extract code from potential markdown code blocks
-        if '```python' in response:
-            code_start = response.find('```python') + 9
-            code_end = response.find('```', code_start)
-            if code_end > code_start:
-                response = response[code_start:code_end].strip()
-        elif '```' in response:
-            code_start = response.find('```') + 3
-            code_end = response.find('```', code_start)
-            if code_end > code_start:
-                response = response[code_start:code_end].strip()
+        code = self.extract_code(response).get('python')
+        if code is None:
+            blocks = parse_code_blocks(response)
+            code = blocks[0].code.strip() if blocks else response
         
-        return response
+        return code
     
-    def generate_database_models(self, requirements):
+    def generate_database_models(self, requirements, api_key=None):
         """Generate SQLAlchemy models"""
         prompt = f"""Create SQLAlchemy database models for:
 
@@ -108,9 +103,9 @@ OUTPUT ONLY THE PYTHON CODE, NO EXPLANATIONS."""
 
 Include relationships, constraints, and proper field types."""
         
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, api_key=api_key)
     
-    def integrate_with_frontend(self, frontend_code, api_code):
+    def integrate_with_frontend(self, frontend_code, api_code, api_key=None):
         """Generate integration instructions"""
         prompt = f"""Provide integration steps for connecting this frontend:
 
@@ -122,4 +117,4 @@ With this backend API:
 
 Include fetch() examples and CORS setup."""
         
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, api_key=api_key)
@@ -1,27 +1,149 @@
 """Base Agent class with Groq integration"""
-import os
-from groq import Groq
+import time
+from groq import APIConnectionError, APIStatusError
+from utils.groq_pool import client_pool
+from utils.key_pool import key_pool
+from utils.rate_limiter import rate_limiter, LLMError, LLMUnavailableError, RateLimitedError
+from utils.llm_cache import llm_cache
+from utils.code_parser import parse_code_blocks, has_unclosed_block
+
+# Fence tags -> extract_code keys
+LANGUAGE_KEYS = {'javascript': 'js', 'py': 'python', 'htm': 'html'}
+HTML_MARKERS = ('<style>', '<script>', '<section', '<header', '<footer')
 
 class BaseAgent:
+    model = "llama-3.3-70b-versatile"  # High-quality model for better conversations
+    temperature = 0.7
+    max_tokens = 2000  # Increased for better code generation
+    cache_responses = False  # Agents opt in to the shared LLM response cache
+    
     def __init__(self, name, role, system_prompt):
         self.name = name
         self.role = role
         self.system_prompt = system_prompt
         
-    def generate_response(self, user_message, context=None, api_key=None):
-        """Generate response using Llama via Groq (FREE)"""
-        # Use provided API key or fallback to .env
-        if not api_key:
-            api_key = os.getenv('GROQ_API_KEY')
-            if not api_key:
-                print("ERROR: No API key provided to agent!")
-                return "Error: No API key provided. Please register with your Groq API key."
+    def generate_response(self, user_message, context=None, api_key=None, on_token=None):
+        """Generate response using Llama via Groq (FREE), streaming deltas to on_token if given
+        
+        Without api_key, each attempt leases a server key from key_pool. Raises
+        RateLimitedError, LLMUnavailableError or LLMError instead of returning error text.
+        """
+        pooled = not api_key
+        if pooled and not key_pool.keys:
+            print("ERROR: No API key provided to agent!")
+            raise LLMError("No API key provided. Please register with your Groq API key.")
+        
+        messages = self._build_messages(user_message, context)
+        
+        # Identical requests are answered from the cache
+        cache_key = None
+        if self.cache_responses and llm_cache.enabled:
+            cache_key = llm_cache.make_key(
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                messages=messages
+            )
+            cached = llm_cache.get(cache_key)
+            if cached is not None:
+                print(f"⚡ LLM cache hit for {self.name}")
+                if on_token:
+                    on_token(cached)
+                return cached
         
-        print(f"DEBUG: Agent using Groq API key: {api_key[:20]}...")
+        # Prompt plus the completion budget; Groq's headers correct the estimate
+        estimated_tokens = sum(len(m['content']) for m in messages) // 4 + self.max_tokens
+        deadline = time.monotonic() + rate_limiter.deadline
+        attempt = 0
+        failure = None  # (error, status) of the last failed attempt
+        while True:
+            leased = None
+            try:
+                if pooled:
+                    # A fresh lease per attempt, so a retry moves off a throttled key
+                    api_key = leased = key_pool.acquire(deadline)
+                rate_limiter.acquire(api_key, estimated_tokens, deadline)
+            except RateLimitedError:
+                if leased:
+                    key_pool.release(leased)
+                if failure is None:
+                    raise
+                # Out of time while retrying; report what actually went wrong
+                raise self._give_up(*failure, api_key) from failure[0]
+            
+            streamed = []
+            outcome = None
+            try:
+                # Reuse the pooled keep-alive client for this key
+                content = self._complete(client_pool.get(api_key), messages, on_token, streamed)
+                outcome = 'ok'
+                break
+            except (APIStatusError, APIConnectionError) as e:
+                status = getattr(e, 'status_code', None)
+                if status in (401, 403):
+                    outcome = 'invalid'
+                elif status == 429:
+                    outcome = 'throttled'
+                elif status is None or status >= 500:
+                    outcome = 'failed'
+                # Any other 4xx is this request's fault (bad payload, too large), not the key's
+                if status is not None and status != 429 and status < 500:
+                    print(f"❌ Groq API error {status} for {self.name}: {e}")
+                    raise LLMError(f"Groq API error {status}: {e}") from e
+                if streamed or attempt >= rate_limiter.max_retries:
+                    raise self._give_up(e, status, api_key) from e
+                # A pooled retry goes to another key, so it needn't wait out this one's block
+                delay = rate_limiter.backoff(attempt, None if pooled else api_key)
+                if time.monotonic() + delay > deadline:
+                    raise self._give_up(e, status, api_key) from e
+                attempt += 1
+                failure = (e, status)
+                print(f"⏳ Groq {status or 'connection error'} for {self.name}, retry {attempt} in {delay:.1f}s")
+                time.sleep(delay)
+            finally:
+                if pooled:
+                    key_pool.release(api_key, outcome, rate_limiter.retry_after(api_key) or None)
         
-        # Create Groq client
-        client = Groq(api_key=api_key)
+        # A cut-off response would be replayed for every retry of the same prompt
+        if cache_key and content and not has_unclosed_block(content):
+            llm_cache.set(cache_key, content)
+        return content
+    
+    def _complete(self, client, messages, on_token, streamed):
+        """One completion call; streamed collects deltas already forwarded to on_token"""
+        # Use Groq's free models (completely FREE, no credits needed)
+        response = client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=on_token is not None
+        )
+        if on_token is None:
+            return response.choices[0].message.content
         
+        # Forward deltas as they arrive and assemble the full text
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                streamed.append(delta)
+                on_token(delta)
+        return "".join(streamed)
+    
+    def _give_up(self, error, status, api_key):
+        """Typed error for a call that ran out of retries or time"""
+        print(f"❌ Groq call for {self.name} failed after retries: {error}")
+        if status == 429:
+            return RateLimitedError(
+                "Groq rate limit reached for this API key, please try again shortly",
+                retry_after=rate_limiter.retry_after(api_key) or None
+            )
+        return LLMUnavailableError(f"Groq API unavailable: {error}")
+    
+    def _build_messages(self, user_message, context=None):
+        """Build the chat messages for a completion request"""
         messages = [
             {"role": "system", "content": self.system_prompt}
         ]
@@ -34,79 +156,33 @@ class BaseAgent:
             })
         
         messages.append({"role": "user", "content": user_message})
-        
-        # Use Groq's free models (completely FREE, no credits needed)
-        try:
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",  # High-quality model for better conversations
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2000  # Increased for better code generation
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            error_msg = f"Error calling Groq API: {str(e)}"
-            print(f"❌ {error_msg}")
-            print(f"API Key used: {api_key[:20]}...")
-            return error_msg
+        return messages
     
     def extract_code(self, response):
-        """Extract code blocks from response - improved version"""
+        """First complete fenced block of each language, keyed html/css/js/python"""
         code_blocks = {}
+        untagged = []
+        blocks = parse_code_blocks(response)
+        for block in blocks:
+            if not block.closed:
+                # Cut off mid-block (max_tokens): half a section is worse than none
+                print(f"⚠️ {self.name}: dropping unterminated {block.language or 'untagged'} code block")
+                continue
+            key = LANGUAGE_KEYS.get(block.language, block.language)
+            if not key:
+                untagged.append(block)
+            elif key not in code_blocks:
+                code_blocks[key] = block.code.strip()
         
-        # Try to extract HTML with language tag
-        if "```html" in response:
-            html_start = response.find("```html") + 7
-            html_end = response.find("```", html_start)
-            if html_end > html_start:
-                code_blocks['html'] = response[html_start:html_end].strip()
-        # Try generic code blocks if no html tag
-        elif "```" in response:
-            # Find first code block (might be HTML without tag)
-            code_start = response.find("```") + 3
-            # Skip newline after ```
-            if response[code_start] == '\n':
-                code_start += 1
-            code_end = response.find("```", code_start)
-            if code_end > code_start:
-                code_content = response[code_start:code_end].strip()
-                # If it looks like HTML, treat it as HTML
-                if '<' in code_content and '>' in code_content:
-                    code_blocks['html'] = code_content
-        # If no code blocks, check if entire response is HTML
-        elif '<style>' in response or '<script>' in response or '<section' in response or '<header' in response or '<footer' in response:
-            # The entire response is likely HTML code
-            code_blocks['html'] = response.strip()
-        
-        # Extract CSS
-        if "```css" in response:
-            css_start = response.find("```css") + 6
-            css_end = response.find("```", css_start)
-            if css_end > css_start:
-                code_blocks['css'] = response[css_start:css_end].strip()
-        
-        # Extract JavaScript
-        if "```javascript" in response or "```js" in response:
-            js_marker = "```javascript" if "```javascript" in response else "```js"
-            js_start = response.find(js_marker) + len(js_marker)
-            js_end = response.find("```", js_start)
-            if js_end > js_start:
-                code_blocks['js'] = response[js_start:js_end].strip()
-        
-        # Extract Python
-        if "```python" in response:
-            py_start = response.find("```python") + 9
-            py_end = response.find("```", py_start)
-            if py_end > py_start:
-                code_blocks['python'] = response[py_start:py_end].strip()
-        
-        # Debug logging
-        if code_blocks:
-            print(f"✅ Extracted code blocks: {list(code_blocks.keys())}")
-            if 'html' in code_blocks:
-                print(f"   HTML length: {len(code_blocks['html'])} characters")
-        else:
-            print(f"⚠️ No code blocks extracted from response")
-            print(f"   Response preview: {response[:200]}...")
+        if 'html' not in code_blocks:
+            # An untagged block that looks like markup is the HTML
+            for block in untagged:
+                if '<' in block.code and '>' in block.code:
+                    code_blocks['html'] = block.code.strip()
+                    break
+            else:
+                # No fences at all: the entire response is likely HTML code
+                if not blocks and any(marker in response for marker in HTML_MARKERS):
+                    code_blocks['html'] = response.strip()
         
         return code_blocks
@@ -1,5 +1,6 @@
 """Frontend Engineer Agent - Generates HTML/CSS/JS"""
 from .base_agent import BaseAgent
+from utils.design_context import build_design_context, token_counter
 
 FRONTEND_SYSTEM_PROMPT = """You are an ELITE Frontend Designer creating STUNNING Framer.ai-quality websites.
 
@@ -167,6 +168,8 @@ BUILD PIXEL-PERFECT. BUILD ANIMATED. BUILD BEAUTIFUL.
 """
 
 class FrontendAgent(BaseAgent):
+    cache_responses = True
+    
     def __init__(self):
         super().__init__(
             name="Frontend Engineer",
@@ -182,7 +185,12 @@ class FrontendAgent(BaseAgent):
     
     def generate_section(self, section_name, requirements, existing_code=None, api_key=None):
         """Generate specific website section with premium quality"""
-        context = f"Existing sections to maintain consistency:\n{existing_code}" if existing_code else ""
+        # A compact summary of earlier sections instead of their raw code keeps
+        # every section's prompt about the size of the first one
+        context = build_design_context(existing_code)
+        if context:
+            raw_tokens, context_tokens = token_counter.record(str(existing_code), context)
+            print(f"🧮 Design context for {section_name}: {context_tokens} tokens instead of {raw_tokens} raw")
         
         # Section-specific design guidelines with code examples
         section_guides = {
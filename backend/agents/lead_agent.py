@@ -1,7 +1,161 @@
 """Engineering Lead Agent - Orchestrates the workflow"""
+import os
+import re
+from collections import namedtuple
+from utils.rate_limiter import LLMError
 from .base_agent import BaseAgent
 
+# Older turns only add session weight; prompts use the last few anyway
+MAX_HISTORY_MESSAGES = 20
+
+# Intents are precompiled once; a rule fires when all of its intents match
+INTENTS = {
+    'website_type': re.compile(r'website|e-?commerce|portfolio|blog|landing|business|shop|site|page|build|create|make'),
+    'suggest': re.compile(r"suggest|help|idea|what should|don'?t know"),
+    'finish': re.compile(r'footer|finish|done|complete'),
+    'more_features': re.compile(r'more features|another feature|add feature'),
+    'regenerate': re.compile(r'regenerate|rebuild|fix'),
+    'header': re.compile(r'header'),
+    'hero': re.compile(r'hero'),
+    'features': re.compile(r'feature'),
+    'footer': re.compile(r'footer')
+}
+
+# intents: all must match ('()' always does); record: gathered_info key that keeps
+# the message; waiting: section we then wait for; reply: key into REPLIES
+Rule = namedtuple('Rule', 'intents record next_stage waiting next_agent reply')
+
+STAGE_RULES = {
+    'initial': [
+        Rule(('website_type',), 'type', 'gathering_details', None, 'lead', 'ask_details'),
+        Rule((), None, 'initial', None, 'lead', 'greeting')
+    ],
+    'gathering_details': [
+        Rule((), 'details', 'waiting_header', 'header', 'lead', 'ask_header')
+    ],
+    'waiting_header': [
+        Rule((), 'header_instructions', 'header', None, 'frontend', 'build_header')
+    ],
+    'header': [
+        Rule((), None, 'waiting_hero', 'hero', 'lead', 'ask_hero')
+    ],
+    'waiting_hero': [
+        Rule(('suggest',), None, 'waiting_hero', 'hero', 'lead', 'suggest_hero'),
+        Rule((), 'hero_instructions', 'hero', None, 'frontend', 'build_hero')
+    ],
+    'hero': [
+        Rule((), None, 'waiting_features', 'features', 'lead', 'ask_features')
+    ],
+    'waiting_features': [
+        Rule(('suggest',), None, 'waiting_features', 'features', 'lead', 'suggest_features'),
+        Rule((), 'features_instructions', 'features', None, 'frontend', 'build_features')
+    ],
+    'features': [
+        Rule(('finish',), None, 'waiting_footer', 'footer', 'lead', 'ask_footer'),
+        Rule(('more_features',), None, 'waiting_features', 'features', 'lead', 'ask_more_features'),
+        Rule((), None, 'features', None, 'lead', 'offer_footer')
+    ],
+    'waiting_footer': [
+        Rule((), 'footer_instructions', 'footer', None, 'frontend', 'build_footer')
+    ],
+    'footer': [
+        Rule((), None, 'complete', None, 'lead', 'complete')
+    ],
+    'complete': [
+        Rule(('regenerate', 'header'), None, 'waiting_header', 'header', 'lead', 'rebuild_header'),
+        Rule(('regenerate', 'hero'), None, 'waiting_hero', 'hero', 'lead', 'rebuild_hero'),
+        Rule(('regenerate', 'features'), None, 'waiting_features', 'features', 'lead', 'rebuild_features'),
+        Rule(('regenerate', 'footer'), None, 'waiting_footer', 'footer', 'lead', 'rebuild_footer'),
+        Rule((), None, 'complete', None, 'lead', 'finished')
+    ]
+}
+
+# reply -> (template, LLM brief). Templates are filled from gathered_info and the
+# _suggest_* helpers; replies with a brief can be worded by the LLM instead by
+# listing them in LEAD_LLM_REPLIES ('all' for every one)
+REPLIES = {
+    'greeting': (
+        "👋 Hi! I'm your web development lead. What kind of website would you like to build?\n\n"
+        "For example:\n- 🛍️ An ecommerce store\n- 💼 A portfolio\n- 🍔 A food delivery site\n- 📝 A blog",
+        "This is the first message. Greet the user warmly and ask what type of website they want to build. Give 3-4 examples (ecommerce, portfolio, food delivery, blog)."
+    ),
+    'ask_details': (
+        "Great choice! 🎨 What should your {kind} be called, and which color scheme do you like? "
+        "A few that suit it:\n{colors}",
+        "User just described their website type. Ask for website name and color scheme in a friendly way. Provide 2-3 color scheme examples based on their website type."
+    ),
+    'ask_header': (
+        "Got it! Let's start with the **header**. Describe how it should look, for example:\n"
+        "- Logo on the left, navigation links on the right\n"
+        "- A sticky glassmorphism bar that blurs the page behind it\n"
+        "- A centered logo with a call-to-action button\n\n"
+        "Or tell me exactly what you have in mind.",
+        "User provided website details: '{message}'. Their website type is: '{website_type}'. Now ask them to describe their header section. Provide 3-4 specific header suggestions tailored to their website type (logo placement, navigation items, style effects like glassmorphism)."
+    ),
+    'ask_hero': (
+        "✅ Header done! Now the **hero section**, the first thing visitors see. "
+        "Tell me the headline, subtitle and button text. For example:\n"
+        "- Headline: \"{headline}\"\n- A one-line subtitle about what makes you different\n"
+        "- A button like \"Get Started\"\n\nSay \"suggest\" if you'd like more ideas.",
+        "The header is complete. Now ask for hero section details. Based on their '{website_type}' website, suggest 2-3 compelling hero section ideas (headline examples, subtitle, CTA button text). Make it specific to their type."
+    ),
+    'suggest_hero': (
+        "Here are some hero ideas for your {kind}:\n"
+        "- **\"{headline}\"** with a short subtitle and a \"Get Started\" button\n"
+        "- A bold question your visitors are asking, answered in the subtitle, with an \"Explore\" button\n"
+        "- A full-width background image with your name and a single \"Contact Us\" button\n\n"
+        "Pick one, mix them, or describe your own.",
+        "User needs hero section suggestions for their '{website_type}' website. Provide 2-3 creative hero headline options with subtitles and CTA button ideas. Be specific and inspiring."
+    ),
+    'ask_features': (
+        "✅ Hero done! Next up: **features**. What would you like to showcase? "
+        "For a {kind}, these usually work well:\n{features}\n\n"
+        "Describe yours, or say \"suggest\" for more ideas.",
+        "Hero section is complete! Now ask for features/services they want to showcase. Based on their '{website_type}' website, suggest 4-5 compelling features that would resonate with their audience. Be creative and specific."
+    ),
+    'suggest_features': (
+        "Features that tend to resonate for a {kind}:\n{features}\n\n"
+        "Pick the ones you like, tweak them, or describe your own.",
+        "User needs feature/service suggestions for their '{website_type}' website. Provide 4-6 specific, compelling features that would attract customers. Make them actionable and benefit-focused."
+    ),
+    'ask_footer': (
+        "✅ Features done! Last step: the **footer**. What should it include? Common choices:\n"
+        "- 📞 Contact info\n- 🔗 Social links\n- ✉️ Newsletter signup\n- 🗺️ Quick links / sitemap",
+        "Features are done! Now ask about the footer. For a '{website_type}' website, suggest what footer elements they might want (contact info, social links, newsletter signup, sitemap, etc.)."
+    ),
+    'ask_more_features': (
+        "Sure! What additional features would you like to add?",
+        "User wants to add more features. Ask what additional features they'd like to add in an encouraging way."
+    ),
+    'offer_footer': (
+        "Features section is complete! 🎉 Ready for the footer? It usually holds contact info, "
+        "social links and a newsletter signup. Say \"footer\" when you're ready, or \"add feature\" for more.",
+        "Features section is complete! Ask if they're ready for the footer in an upbeat way. Briefly mention what a footer typically includes."
+    ),
+    'build_header': ("Building header: {message}", None),
+    'build_hero': ("Building hero section: {message}", None),
+    'build_features': ("Building features section: {message}", None),
+    'build_footer': ("Building footer: {message}", None),
+    'complete': (
+        "🎉 **Your website is complete!**\n\n✅ Frontend sections built\n✅ Backend API generating...\n✅ Tests running...\n\n"
+        "Click **Download** to get your full-stack project with:\n- Complete HTML/CSS/JS website\n- Flask backend API\n- Test results\n- Setup instructions",
+        None
+    ),
+    'rebuild_header': ("Let's rebuild the header! Describe how you want it:", None),
+    'rebuild_hero': ("Let's rebuild the hero section! What should it say?", None),
+    'rebuild_features': ("Let's rebuild the features section! What features should I showcase?", None),
+    'rebuild_footer': ("Let's rebuild the footer! What should it include?", None),
+    'finished': (
+        "Your website is ready! You can download it or start a new project by clicking Reset.\n\n"
+        "Tip: If any section looks wrong, say 'regenerate [section name]' (e.g., 'regenerate features')",
+        None
+    )
+}
+
+
 class LeadAgent(BaseAgent):
+    cache_responses = True
+    
     def __init__(self):
         super().__init__(
             name="Engineering Lead",
@@ -21,7 +175,26 @@ Keep responses conversational, concise, and actionable."""
         self.waiting_for_section = None  # Track which section we're waiting to build
         self.conversation_history = []  # Track conversation for context
     
-    def _generate_contextual_response(self, user_message, stage_context, api_key):
+    def to_state(self):
+        """Compact, JSON-serializable state for the session store"""
+        return {
+            'current_stage': self.current_stage,
+            'gathered_info': self.gathered_info,
+            'waiting_for_section': self.waiting_for_section,
+            'conversation_history': self.conversation_history
+        }
+    
+    @classmethod
+    def from_state(cls, state):
+        """Rebuild a lead agent from to_state() output"""
+        agent = cls()
+        agent.current_stage = state.get('current_stage', 'initial')
+        agent.gathered_info = state.get('gathered_info', {})
+        agent.waiting_for_section = state.get('waiting_for_section')
+        agent.conversation_history = state.get('conversation_history', [])[-MAX_HISTORY_MESSAGES:]
+        return agent
+    
+    def _generate_contextual_response(self, user_message, stage_context, api_key, on_token=None):
         """Use LLM to generate contextual, helpful responses"""
         # Build context message
         context = f"""
@@ -42,255 +215,101 @@ Generate a helpful, conversational response that:
         messages.append({"role": "user", "content": context})
         
         # Generate response using the model
-        response = self.generate_response(context, api_key=api_key)
+        response = self.generate_response(context, api_key=api_key, on_token=on_token)
         
         # Update conversation history
         self.conversation_history.append({"role": "user", "content": user_message})
         self.conversation_history.append({"role": "assistant", "content": response})
+        del self.conversation_history[:-MAX_HISTORY_MESSAGES]
         
         return response
     
-    def process_request(self, user_message, rag_context=None, api_key=None):
+    def process_request(self, user_message, rag_context=None, api_key=None, on_token=None):
         """Process user request with intelligent stage management"""
+        return self._advance(user_message, api_key, on_token)
+    
+    def section_complete(self, section, api_key=None, on_token=None):
+        """Advance past a section the frontend agent just built and ask for the next one"""
+        return self._advance(f"Section {section} complete", api_key, on_token, user_turn=False)
+    
+    def _advance(self, user_message, api_key, on_token, user_turn=True):
+        """Fire the first matching rule of the current stage, then phrase its reply"""
         user_lower = user_message.lower()
-        
-        # Initial stage - user describes what they want
-        if self.current_stage == "initial":
-            # Check if they mentioned website type or any website-related intent
-            if any(word in user_lower for word in ['website', 'ecommerce', 'portfolio', 'blog', 'landing', 'business', 'shop', 'site', 'page', 'build', 'create', 'make']):
-                self.gathered_info['type'] = user_message
-                self.current_stage = "gathering_details"
-                
-                # Use LLM to generate contextual response
-                stage_context = "User just described their website type. Ask for website name and color scheme in a friendly way. Provide 2-3 color scheme examples based on their website type."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'gathering_details'
-                }
-            else:
-                # Use LLM for initial greeting
-                stage_context = "This is the first message. Greet the user warmly and ask what type of website they want to build. Give 3-4 examples (ecommerce, portfolio, food delivery, blog)."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'initial'
-                }
-        
-        # Gathering details stage
-        elif self.current_stage == "gathering_details":
-            self.gathered_info['details'] = user_message
-            self.current_stage = "waiting_header"
-            self.waiting_for_section = "header"
-            
-            # Use LLM to suggest header ideas based on website type
-            website_type = self.gathered_info.get('type', '')
-            stage_context = f"User provided website details: '{user_message}'. Their website type is: '{website_type}'. Now ask them to describe their header section. Provide 3-4 specific header suggestions tailored to their website type (logo placement, navigation items, style effects like glassmorphism)."
-            response = self._generate_contextual_response(user_message, stage_context, api_key)
-            
-            return {
-                'response': response,
-                'next_agent': 'lead',
-                'stage': 'waiting_header'
-            }
-        
-        # Waiting for header instructions
-        elif self.current_stage == "waiting_header":
-            self.gathered_info['header_instructions'] = user_message
-            self.current_stage = "header"
-            self.waiting_for_section = None
-            return {
-                'response': f"Building header: {user_message}",
-                'next_agent': 'frontend',
-                'stage': 'header'
-            }
-        
-        # Header built - ask for hero instructions
-        elif self.current_stage == "header":
-            self.current_stage = "waiting_hero"
-            self.waiting_for_section = "hero"
-            
-            # Use LLM to suggest hero section ideas
-            website_type = self.gathered_info.get('type', '')
-            stage_context = f"The header is complete. Now ask for hero section details. Based on their '{website_type}' website, suggest 2-3 compelling hero section ideas (headline examples, subtitle, CTA button text). Make it specific to their type."
-            response = self._generate_contextual_response(user_message, stage_context, api_key)
-            
+        rules = STAGE_RULES.get(self.current_stage)
+        if not rules:
+            # Unknown stage (e.g. from an old session) - should never happen but just in case
             return {
-                'response': response,
+                'response': f"I'm currently waiting for: {self.waiting_for_section or 'your input'}. What would you like to do?",
                 'next_agent': 'lead',
-                'stage': 'waiting_hero'
+                'stage': self.current_stage
             }
         
-        # Waiting for hero instructions
-        elif self.current_stage == "waiting_hero":
-            # Check if user is asking for suggestions
-            if any(word in user_lower for word in ['suggest', 'help', 'idea', 'what should', 'dont know', "don't know"]):
-                website_type = self.gathered_info.get('type', '')
-                stage_context = f"User needs hero section suggestions for their '{website_type}' website. Provide 2-3 creative hero headline options with subtitles and CTA button ideas. Be specific and inspiring."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'waiting_hero'
-                }
-            else:
-                # User provided hero instructions
-                self.gathered_info['hero_instructions'] = user_message
-                self.current_stage = "hero"
-                self.waiting_for_section = None
-                return {
-                    'response': f"Building hero section: {user_message}",
-                    'next_agent': 'frontend',
-                    'stage': 'hero'
-                }
+        rule = next(rule for rule in rules if all(INTENTS[intent].search(user_lower) for intent in rule.intents))
+        if rule.record:
+            self.gathered_info[rule.record] = user_message
+        self.current_stage = rule.next_stage
+        self.waiting_for_section = rule.waiting
         
-        # Hero built - ask for features instructions
-        elif self.current_stage == "hero":
-            self.current_stage = "waiting_features"
-            self.waiting_for_section = "features"
-            
-            # Use LLM to suggest features
-            website_type = self.gathered_info.get('type', '')
-            stage_context = f"Hero section is complete! Now ask for features/services they want to showcase. Based on their '{website_type}' website, suggest 4-5 compelling features that would resonate with their audience. Be creative and specific."
-            response = self._generate_contextual_response(user_message, stage_context, api_key)
-            
-            return {
-                'response': response,
-                'next_agent': 'lead',
-                'stage': 'waiting_features'
-            }
-        
-        # Waiting for features instructions
-        elif self.current_stage == "waiting_features":
-            # Check if user is asking for suggestions
-            if any(word in user_lower for word in ['suggest', 'help', 'idea', 'what should', 'dont know', "don't know"]):
-                website_type = self.gathered_info.get('type', '')
-                stage_context = f"User needs feature/service suggestions for their '{website_type}' website. Provide 4-6 specific, compelling features that would attract customers. Make them actionable and benefit-focused."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'waiting_features'
-                }
-            else:
-                # User provided features
-                self.gathered_info['features_instructions'] = user_message
-                self.current_stage = "features"
-                self.waiting_for_section = None
-                return {
-                    'response': f"Building features section: {user_message}",
-                    'next_agent': 'frontend',
-                    'stage': 'features'
-                }
-        
-        # Features built - ask what's next
-        elif self.current_stage == "features":
-            if any(word in user_lower for word in ['footer', 'finish', 'done', 'complete']):
-                self.current_stage = "waiting_footer"
-                self.waiting_for_section = "footer"
-                
-                # Use LLM to ask about footer with suggestions
-                website_type = self.gathered_info.get('type', '')
-                stage_context = f"Features are done! Now ask about the footer. For a '{website_type}' website, suggest what footer elements they might want (contact info, social links, newsletter signup, sitemap, etc.)."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'waiting_footer'
-                }
-            elif 'more features' in user_lower or 'another feature' in user_lower or 'add feature' in user_lower:
-                self.current_stage = "waiting_features"
-                
-                # Use LLM to ask about additional features
-                stage_context = "User wants to add more features. Ask what additional features they'd like to add in an encouraging way."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'waiting_features'
-                }
-            else:
-                # Auto-ask about footer with LLM
-                stage_context = "Features section is complete! Ask if they're ready for the footer in an upbeat way. Briefly mention what a footer typically includes."
-                response = self._generate_contextual_response(user_message, stage_context, api_key)
-                
-                return {
-                    'response': response,
-                    'next_agent': 'lead',
-                    'stage': 'features'
-                }
+        response = self._phrase(rule.reply, user_message, api_key, on_token, user_turn)
+        return {
+            'response': response,
+            'next_agent': rule.next_agent,
+            'stage': rule.next_stage
+        }
+    
+    def _phrase(self, reply, user_message, api_key, on_token, user_turn):
+        """Fill the reply template, or let the LLM word it if LEAD_LLM_REPLIES opts this reply in"""
+        template, brief = REPLIES[reply]
+        website_type = self.gathered_info.get('type', '')
+        params = {
+            'message': user_message,
+            'website_type': website_type,
+            'kind': self._website_kind(website_type),
+            'headline': self._suggest_hero_headline(website_type),
+            'features': self._suggest_features(website_type),
+            'colors': self._suggest_color_schemes(website_type)
+        }
         
-        # Waiting for footer instructions
-        elif self.current_stage == "waiting_footer":
-            self.gathered_info['footer_instructions'] = user_message
-            self.current_stage = "footer"
-            self.waiting_for_section = None
-            return {
-                'response': f"Building footer: {user_message}",
-                'next_agent': 'frontend',
-                'stage': 'footer'
-            }
+        if brief and self._llm_phrased(reply):
+            try:
+                return self._generate_contextual_response(user_message, brief.format(**params), api_key, on_token)
+            except LLMError as e:
+                # Phrasing is optional; the template still moves the conversation on
+                print(f"⚠️ Lead reply '{reply}' falling back to its template: {e}")
         
-        # Footer complete
-        elif self.current_stage == "footer":
-            self.current_stage = "complete"
-            return {
-                'response': "🎉 **Your website is complete!**\n\n✅ Frontend sections built\n✅ Backend API generating...\n✅ Tests running...\n\nClick **Download** to get your full-stack project with:\n- Complete HTML/CSS/JS website\n- Flask backend API\n- Test results\n- Setup instructions",
-                'next_agent': 'lead',
-                'stage': 'complete'
-            }
+        response = template.format(**params)
+        if brief:
+            # Conversational replies stream and go into history like LLM ones did
+            if on_token:
+                on_token(response)
+            if user_turn:
+                self.conversation_history.append({"role": "user", "content": user_message})
+            self.conversation_history.append({"role": "assistant", "content": response})
+            del self.conversation_history[:-MAX_HISTORY_MESSAGES]
+        return response
+    
+    def _llm_phrased(self, reply):
+        opted_in = {name.strip() for name in os.getenv('LEAD_LLM_REPLIES', '').split(',') if name.strip()}
+        return 'all' in opted_in or reply in opted_in
+    
+    def _website_kind(self, website_type):
+        """Short name for the kind of site, used in reply templates"""
+        kinds = {
+            'ecommerce': 'online store',
+            'shop': 'online store',
+            'portfolio': 'portfolio',
+            'blog': 'blog',
+            'landing': 'landing page',
+            'business': 'business site',
+            'restaurant': 'restaurant site',
+            'food': 'food delivery site'
+        }
         
-        # Complete stage
-        elif self.current_stage == "complete":
-            # Check if user wants to regenerate a section
-            if 'regenerate' in user_lower or 'rebuild' in user_lower or 'fix' in user_lower:
-                if 'header' in user_lower:
-                    self.current_stage = "waiting_header"
-                    return {
-                        'response': "Let's rebuild the header! Describe how you want it:",
-                        'next_agent': 'lead',
-                        'stage': 'waiting_header'
-                    }
-                elif 'hero' in user_lower:
-                    self.current_stage = "waiting_hero"
-                    return {
-                        'response': "Let's rebuild the hero section! What should it say?",
-                        'next_agent': 'lead',
-                        'stage': 'waiting_hero'
-                    }
-                elif 'feature' in user_lower:
-                    self.current_stage = "waiting_features"
-                    return {
-                        'response': "Let's rebuild the features section! What features should I showcase?",
-                        'next_agent': 'lead',
-                        'stage': 'waiting_features'
-                    }
-                elif 'footer' in user_lower:
-                    self.current_stage = "waiting_footer"
-                    return {
-                        'response': "Let's rebuild the footer! What should it include?",
-                        'next_agent': 'lead',
-                        'stage': 'waiting_footer'
-                    }
-            
-            return {
-                'response': "Your website is ready! You can download it or start a new project by clicking Reset.\n\nTip: If any section looks wrong, say 'regenerate [section name]' (e.g., 'regenerate features')",
-                'next_agent': 'lead',
-                'stage': 'complete'
-            }
+        for key, value in kinds.items():
+            if key in website_type.lower():
+                return value
         
-        # Default fallback - should never reach here but just in case
-        return {
-            'response': f"I'm currently waiting for: {self.waiting_for_section or 'your input'}. What would you like to do?",
-            'next_agent': 'lead',
-            'stage': self.current_stage
-        }
+        return 'website'
     
     def _suggest_hero_headline(self, website_type):
         """Suggest hero headline based on website type"""
@@ -322,3 +341,19 @@ Generate a helpful, conversational response that:
                 return value
         
         return '✨ Feature One\n🚀 Feature Two\n💡 Feature Three'
+    
+    def _suggest_color_schemes(self, website_type):
+        """Suggest color schemes based on website type"""
+        suggestions = {
+            'ecommerce': '🖤 Black & gold (premium)\n🤍 Clean white & coral (friendly)\n💙 Navy & sky blue (trustworthy)',
+            'portfolio': '⚫ Monochrome with one accent color\n💜 Deep purple & neon (creative)\n🤎 Warm beige & charcoal (minimal)',
+            'blog': '📰 Off-white & ink black (readable)\n🌿 Sage green & cream (calm)\n🌙 Dark mode with teal accents',
+            'food': '🍅 Tomato red & cream (appetizing)\n🧡 Orange & charcoal (energetic)\n🌿 Fresh green & white (healthy)',
+            'business': '💙 Navy & white (professional)\n🩶 Slate gray & teal (modern)\n💚 Forest green & gold (established)'
+        }
+        
+        for key, value in suggestions.items():
+            if key in website_type.lower():
+                return value
+        
+        return '💙 Blue & white (clean)\n💜 Purple gradient (modern)\n🖤 Dark mode with a bright accent (bold)'
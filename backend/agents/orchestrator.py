@@ -1,43 +1,165 @@
 """Multi-Agent Orchestrator for AIDevs - Simplified version"""
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from utils.task_graph import TaskGraph
+from utils.job_queue import JobQueue
+from utils.semantic_cache import SectionSemanticCache
+from utils.design_context import build_design_context
+from utils.artifact_store import ArtifactStore
+from utils.html_analyzer import format_report
+from utils.session_store import create_session_store, SessionConflictError
+from utils.rate_limiter import LLMError
+from utils.single_flight import SingleFlight
 from .lead_agent import LeadAgent
 from .frontend_agent import FrontendAgent
 from .backend_agent import BackendAgent
 from .test_agent import TestAgent
 
+BUILD_ENDPOINTS = "GET /api/health, POST /api/contact, POST /api/subscribe"
+
+# Session fields owned by chat turns; build jobs write their own fields
+TURN_FIELDS = ('current_stage', 'frontend_code', 'lead_agent', 'build_job_id')
+
 class AIDevsOrchestrator:
     def __init__(self, rag_manager):
         self.rag_manager = rag_manager
         self.frontend_agent = FrontendAgent()
         self.backend_agent = BackendAgent()
         self.test_agent = TestAgent()
-        self.sessions = {}
+        self.session_store = create_session_store(
+            encode=self._encode_session,
+            decode=self._decode_session
+        )
+        # Bounded pool shared by every post-footer build graph
+        self.build_executor = ThreadPoolExecutor(max_workers=int(os.getenv('BUILD_MAX_WORKERS', 4)))
+        # Runs a turn's independent agent calls side by side (green threads under gevent)
+        self.turn_executor = ThreadPoolExecutor(max_workers=int(os.getenv('TURN_MAX_WORKERS', 64)))
+        self._turn_stats_lock = threading.Lock()
+        self.turn_stats = {'turns': 0, 'overlapped': 0, 'wall_time': 0.0, 'serial_time': 0.0}
+        self.jobs = JobQueue()
+        self.section_cache = SectionSemanticCache(rag_manager)
+        self.artifacts = ArtifactStore()
+        
+        # Combined preview documents keyed by (session_id, preview_etag); a new
+        # section bumps content_version, so stale entries just age out
+        self._previews = OrderedDict()
+        self._previews_lock = threading.Lock()
+        self.preview_cache_entries = int(os.getenv('PREVIEW_CACHE_ENTRIES', 256))
+        
+        # Duplicate sends (double clicks, client retries) run once per worker;
+        # finished turns with an idempotency key are replayed from the session
+        self.turn_flights = SingleFlight()
+        self.idempotency_ttl = float(os.getenv('IDEMPOTENCY_TTL', 24 * 3600))
+        self.idempotency_max_keys = int(os.getenv('IDEMPOTENCY_MAX_KEYS', 20))
+        # A key is claimed in the shared store before the turn runs, so a retry on
+        # another worker waits for it; claims older than this are presumed dead
+        self.idempotency_pending_timeout = float(os.getenv('IDEMPOTENCY_PENDING_TIMEOUT', 300))
+        self.idempotency_poll_interval = float(os.getenv('IDEMPOTENCY_POLL_INTERVAL', 0.5))
+    
+    def process_message(self, user_message, session_id, api_key=None, on_event=None, idempotency_key=None):
+        """Run one chat turn; on_event(name, data) receives progress events for streaming
+        
+        Identical concurrent messages for a session share one execution. With an
+        idempotency_key, a repeat of a finished turn returns its stored response
+        (marked 'replayed') instead of running again, and a repeat of a turn still
+        running on any worker waits for it.
+        """
+        if idempotency_key:
+            flight_key = (session_id, 'key', idempotency_key)
+        else:
+            flight_key = (session_id, 'message', hashlib.sha256(user_message.encode('utf-8')).hexdigest())
+        
+        def run():
+            if not idempotency_key:
+                return self._process_turn(user_message, session_id, api_key, on_event, None)
+            while True:
+                entry = self._claim_turn(session_id, idempotency_key)
+                if entry is None:
+                    break
+                if 'response' in entry:
+                    print(f"♻️ Replaying turn {idempotency_key[:12]} for {session_id}")
+                    return dict(entry['response'], replayed=True)
+                # Running elsewhere: wait for its response (or for the claim to lapse)
+                time.sleep(self.idempotency_poll_interval)
+            try:
+                return self._process_turn(user_message, session_id, api_key, on_event, idempotency_key)
+            except BaseException:
+                self._release_turn(session_id, idempotency_key)
+                raise
+        
+        response, shared = self.turn_flights.do(flight_key, run)
+        if shared:
+            print(f"🔗 Coalesced duplicate turn for {session_id}")
+            response = dict(response, replayed=True)
+        return response
     
-    def process_message(self, user_message, session_id, api_key=None):
+    def _live_entry(self, stored, idempotency_key, now):
+        entry = stored.get('idempotency', {}).get(idempotency_key)
+        if entry is None:
+            return None
+        ttl = self.idempotency_pending_timeout if entry.get('pending') else self.idempotency_ttl
+        return entry if entry['at'] + ttl >= now else None
+    
+    def _claim_turn(self, session_id, idempotency_key):
+        """None if this caller now owns the key, else its live entry (pending or with a response)"""
+        now = time.time()
+        existing = []
+        
+        def claim(stored):
+            entry = self._live_entry(stored, idempotency_key, now)
+            if entry is not None:
+                existing.append(entry)
+                return False
+            stored.setdefault('idempotency', {})[idempotency_key] = {'at': now, 'pending': True}
+        
+        self.session_store.update(session_id, claim, create=self._new_session)
+        return existing[0] if existing else None
+    
+    def _release_turn(self, session_id, idempotency_key):
+        """Drop our pending claim after a failed turn so a retry can run it"""
+        def release(stored):
+            entry = stored.get('idempotency', {}).get(idempotency_key)
+            if entry is None or not entry.get('pending'):
+                return False
+            del stored['idempotency'][idempotency_key]
+        
         try:
-            if session_id not in self.sessions:
-                self.sessions[session_id] = {
-                    'current_stage': 'initial',
-                    'frontend_code': {},
-                    'backend_code': '',
-                    'test_results': '',
-                    'conversation_history': [],
-                    'api_key': api_key,
-                    'lead_agent': LeadAgent()  # Each session gets its own lead agent
-                }
-            
-            session = self.sessions[session_id]
-            
-            # Update API key if provided
-            if api_key:
-                session['api_key'] = api_key
+            self.session_store.update(session_id, release)
+        except Exception as e:
+            print(f"⚠️ Could not release turn {idempotency_key[:12]} for {session_id}: {e}")
+    
+    def _process_turn(self, user_message, session_id, api_key, on_event, idempotency_key):
+        def emit(event, **data):
+            if on_event:
+                on_event(event, data)
+        
+        def on_token(text):
+            emit('token', text=text)
+        
+        try:
+            turn_start = time.perf_counter()
+            session, _ = self.session_store.get(session_id)
+            if session is None:
+                session = self._new_session()
+            # Turns are checked against this on save; build jobs merge without bumping it
+            turn_version = session.get('turn_version', 0)
             
-            # Use user's API key for agents
-            user_api_key = session.get('api_key')
+            # Use user's API key for agents (never persisted in the session)
+            user_api_key = api_key
             
             rag_context = self.rag_manager.retrieve_context(user_message, session_id)
             result = session['lead_agent'].process_request(
-                user_message, rag_context, user_api_key
+                user_message, rag_context, user_api_key,
+                on_token=on_token if on_event else None
             )
+            timings = {'lead': round(time.perf_counter() - turn_start, 3)}
             
             self.rag_manager.store_interaction(
                 session_id=session_id,
@@ -48,17 +170,41 @@ class AIDevsOrchestrator:
             )
             
             session['current_stage'] = result['stage']
+            emit('stage', stage=result['stage'])
+            job_ids = []
+            section_changed = False
             
             if result['next_agent'] == 'frontend':
                 section = self._determine_section(result['stage'])
                 print(f"🎨 Generating {section} section...")
+                emit('section_started', section=section)
                 
-                frontend_result = self.frontend_agent.generate_section(
+                # The follow-up prompt doesn't depend on the generated HTML, so the
+                # lead advances while the section is built; its state is rolled
+                # back if the build fails. to_state() shares the agent's lists and
+                # dicts, so the snapshot is a deep copy
+                lead_snapshot = copy.deepcopy(session['lead_agent'].to_state())
+                # Follow-up tokens are held back until the section is in, so a
+                # failed build never streams a prompt for the next section
+                follow_up_tokens = []
+                graph = TaskGraph(f'{section}_turn')
+                graph.add('section', lambda: self._generate_section(
                     section,
                     user_message,
                     session['frontend_code'],
                     user_api_key
-                )
+                ))
+                graph.add('next_prompt', lambda: session['lead_agent'].section_complete(
+                    section,
+                    user_api_key,
+                    on_token=follow_up_tokens.append if on_event else None
+                ))
+                results = graph.run(self.turn_executor)
+                timings['overlap'] = graph.summary()
+                if isinstance(graph.errors.get('section'), LLMError):
+                    # Nothing is saved; the caller maps this to 429/503 so the user retries
+                    raise graph.errors['section']
+                frontend_result = results.get('section')
                 
                 print(f"📦 Frontend result: {type(frontend_result)}")
                 if frontend_result:
@@ -70,13 +216,13 @@ class AIDevsOrchestrator:
                             html_length = len(frontend_result['code'].get('html', ''))
                             print(f"   - HTML length: {html_length} characters")
                 
-                if frontend_result and 'code' in frontend_result:
-                    html_code = frontend_result['code'].get('html', '')
-                    if html_code:
-                        session['frontend_code'][section] = html_code
-                        print(f"✅ Stored {section} section ({len(html_code)} chars)")
-                    else:
-                        print(f"⚠️ No HTML code in {section} section!")
+                # No HTML (e.g. a truncated response) counts as a failed build
+                if frontend_result and frontend_result.get('code', {}).get('html'):
+                    html_code = frontend_result['code']['html']
+                    session['frontend_code'][section] = html_code
+                    section_changed = True
+                    print(f"✅ Stored {section} section ({len(html_code)} chars)")
+                    emit('section_finished', section=section, success=True, length=len(html_code))
                     
                     self.rag_manager.store_interaction(
                         session_id=session_id,
@@ -86,115 +232,341 @@ class AIDevsOrchestrator:
                         stage=result['stage']
                     )
                     
-                    # Advance lead agent stage after successful frontend build
-                    # This triggers the lead agent to ask for the next section
-                    next_stage_result = session['lead_agent'].process_request(
-                        f"Section {section} complete",
-                        rag_context,
-                        user_api_key
-                    )
+                    next_stage_result = results.get('next_prompt')
+                    if next_stage_result is None:
+                        # Follow-up failed on its own; retry it now that the section is in
+                        session['lead_agent'] = LeadAgent.from_state(lead_snapshot)
+                        next_stage_result = session['lead_agent'].section_complete(
+                            section, user_api_key,
+                            on_token=on_token if on_event else None
+                        )
+                    elif follow_up_tokens:
+                        on_token(''.join(follow_up_tokens))
+                    emit('stage', stage=session['lead_agent'].current_stage)
                     
                     # Auto-trigger backend and test after footer is complete
                     if result['stage'] == 'footer':
-                        print("\n" + "="*60)
-                        print("🎉 FOOTER COMPLETED! AUTO-GENERATING BACKEND & TESTS")
-                        print("="*60)
-                        
-                        # Generate backend API
-                        combined_html = self.frontend_agent.combine_sections(session['frontend_code'])
-                        
-                        # Create detailed requirements for backend
-                        website_type = session.get('website_type', 'general')
-                        backend_requirements = f"""Create a production-ready Flask backend API for this {website_type} website.
-
-FRONTEND STRUCTURE:
-{combined_html[:1500]}
-
-REQUIRED FEATURES:
-1. Contact form endpoint (POST /api/contact) - validate name, email, message
-2. Newsletter subscription (POST /api/subscribe) - validate email
-3. CORS configuration for frontend
-4. Input validation and error handling
-5. JSON responses with proper status codes
-6. Health check endpoint (GET /api/health)
-
-Generate COMPLETE, PRODUCTION-READY Flask code that can run immediately."""
-                        
-                        print("📡 Calling Backend Agent...")
-                        backend_response = self.backend_agent.generate_api(
-                            frontend_requirements=backend_requirements,
-                            context=user_api_key
-                        )
-                        
-                        # Extract code from response
-                        backend_generated = False
-                        if backend_response:
-                            session['backend_code'] = backend_response
-                            backend_generated = True
-                            self.rag_manager.store_interaction(
-                                session_id=session_id,
-                                agent='backend',
-                                message="Auto-generated backend after footer completion",
-                                response=backend_response[:500],
-                                stage='backend_generation'
+                        # Runs on the job pool so this request returns immediately
+                        build_snapshot = {
+                            'frontend_code': dict(session['frontend_code']),
+                            'session_tag': session.get('session_tag')
+                        }
+                        job_id = self.jobs.submit(
+                            session_id, 'build',
+                            lambda: self._run_build_phase(build_snapshot, session_id, user_api_key),
+                            on_finish=lambda job: self._publish_build_finished(
+                                session_id, job, build_snapshot['session_tag']
                             )
-                            print(f"✅ Backend API generated: {len(backend_response)} characters")
-                            print(f"   Preview: {backend_response[:150]}...")
-                        else:
-                            print("❌ Backend generation returned empty!")
-                        
-                        # Run tests
-                        print("🧪 Running frontend tests...")
-                        test_result = self.test_agent.test_frontend(
-                            html_code=combined_html,
-                            requirements="Validate responsive design, accessibility, and functionality"
                         )
-                        
-                        if test_result:
-                            session['test_results'] = test_result
-                            self.rag_manager.store_interaction(
-                                session_id=session_id,
-                                agent='test',
-                                message="Auto-ran tests after footer completion",
-                                response=str(test_result)[:500],
-                                stage='testing'
-                            )
-                            print(f"✅ Tests completed: {len(str(test_result))} characters")
-                            print(f"   Preview: {str(test_result)[:150]}...")
-                        else:
-                            print("❌ Test generation returned empty!")
-                        
-                        print("="*60)
-                        print(f"📊 SUMMARY:")
-                        print(f"   Frontend: {len(combined_html)} chars")
-                        print(f"   Backend: {len(session.get('backend_code', ''))} chars")
-                        print(f"   Tests: {len(str(session.get('test_results', '')))} chars")
-                        print("="*60 + "\n")
-                        
-                        # Update the response to inform user about backend generation
-                        if backend_generated:
-                            result['response'] = next_stage_result.get('response', '') + "\n\n✅ **Backend Integration Complete!** Your Flask API has been generated and integrated with the frontend. You can now download the complete full-stack project!"
-                        else:
-                            result['response'] = next_stage_result.get('response', '') + "\n\n⚠️ **Note:** There was an issue generating the backend. The frontend is ready, but please try again for the complete package."
+                        # Status and download only trust this session's own build
+                        session['build_job_id'] = job_id
+                        job_ids.append(job_id)
+                        emit('build_queued', job_id=job_id)
+                        result['response'] = next_stage_result.get('response', '') + "\n\n⏳ **Building your backend...** Your Flask API and tests are being generated in the background. The Download button will unlock as soon as they're ready!"
                     else:
                         # For non-footer sections, use the next prompt from lead agent
                         result['response'] = next_stage_result.get('response', result['response'])
                 else:
-                    # Frontend generation failed
+                    # Frontend generation failed; the lead waits for this section again
+                    session['lead_agent'] = LeadAgent.from_state(lead_snapshot)
                     print(f"❌ Frontend generation failed for {section}")
+                    emit('section_finished', section=section, success=False, length=0)
                     result['response'] = f"I encountered an issue generating the {section} section. Please try again or provide more specific details."
             
-            return {
+            # Persist this turn, merging over fields a build job may have saved meanwhile
+            changes = {field: session.get(field) for field in TURN_FIELDS}
+            
+            response = {
                 'message': result['response'],
                 'stage': result['stage'],
-                'has_preview': bool(session['frontend_code'])
+                'has_preview': bool(session['frontend_code']),
+                'jobs': job_ids
             }
+            
+            def merge_turn(stored):
+                if stored.get('turn_version', 0) != turn_version:
+                    # Another turn finished first (e.g. on another worker); saving
+                    # over it would silently drop its stage, sections and history
+                    raise SessionConflictError(f"Session {session_id} was changed by another message")
+                stored.update(changes)
+                stored['turn_version'] = turn_version + 1
+                if section_changed:
+                    stored['content_version'] = stored.get('content_version', 0) + 1
+                if idempotency_key:
+                    # Saved with the turn itself, so a retry never sees one without the other
+                    self._remember_turn(stored, idempotency_key, dict(
+                        response, preview_version=stored.get('content_version', 0)
+                    ))
+            
+            saved = self.session_store.update(session_id, merge_turn, create=self._new_session)
+            timings['total'] = round(time.perf_counter() - turn_start, 3)
+            self._record_turn(timings)
+            emit('timings', **timings)
+            if section_changed:
+                # Pushed to /api/events subscribers on every worker
+                self.session_store.publish(session_id, 'section_stored', {
+                    'section': section,
+                    'preview_version': saved.get('content_version', 0)
+                })
+            
+            return dict(
+                response,
+                preview_version=saved.get('content_version', 0),
+                timings=timings,
+                replayed=False
+            )
+        except (LLMError, SessionConflictError):
+            raise
         except Exception as e:
             import traceback
             print("ERROR in orchestrator.process_message:")
             print(traceback.format_exc())
             raise
     
+    def _remember_turn(self, stored, idempotency_key, response):
+        """Keep a turn's response under its key, dropping expired and oldest entries"""
+        now = time.time()
+        entries = {
+            key: entry for key, entry in stored.get('idempotency', {}).items()
+            if entry['at'] + self.idempotency_ttl >= now
+        }
+        entries[idempotency_key] = {'at': now, 'response': response}
+        newest = sorted(entries, key=lambda key: entries[key]['at'])[-self.idempotency_max_keys:]
+        stored['idempotency'] = {key: entries[key] for key in newest}
+    
+    def _record_turn(self, timings):
+        """Log a turn's timings and add them to the running totals"""
+        overlap = timings.get('overlap')
+        saved = max(overlap['serial_time'] - overlap['wall_time'], 0.0) if overlap else 0.0
+        if overlap:
+            print(f"⏱️ Turn {timings['total']:.2f}s (lead {timings['lead']:.2f}s, "
+                  f"overlapped calls {overlap['wall_time']:.2f}s vs {overlap['serial_time']:.2f}s serial, saved {saved:.2f}s)")
+        with self._turn_stats_lock:
+            self.turn_stats['turns'] += 1
+            self.turn_stats['wall_time'] += timings['total']
+            self.turn_stats['serial_time'] += timings['total'] + saved
+            if overlap:
+                self.turn_stats['overlapped'] += 1
+    
+    def get_turn_stats(self):
+        """Chat turn latency totals, including the time saved by overlapping agent calls"""
+        with self._turn_stats_lock:
+            stats = dict(self.turn_stats)
+        turns = stats['turns'] or 1
+        stats['avg_turn_time'] = round(stats['wall_time'] / turns, 3)
+        stats['time_saved'] = round(stats['serial_time'] - stats['wall_time'], 3)
+        stats['wall_time'] = round(stats['wall_time'], 3)
+        stats['serial_time'] = round(stats['serial_time'], 3)
+        return stats
+    
+    def _new_session(self):
+        return {
+            'current_stage': 'initial',
+            'frontend_code': {},
+            'backend_code': '',
+            'test_results': '',
+            'conversation_history': [],
+            'content_version': 0,  # Bumped whenever a section's HTML changes
+            'turn_version': 0,  # Bumped by every saved chat turn
+            'session_tag': uuid.uuid4().hex[:12],  # Keeps versions unique across resets
+            'build_job_id': None,  # Latest post-footer build started by this session
+            'lead_agent': LeadAgent()  # Each session gets its own lead agent
+        }
+    
+    def _encode_session(self, session):
+        """Session -> plain JSON data for shared session stores"""
+        data = dict(session)
+        data['lead_agent'] = session['lead_agent'].to_state()
+        return data
+    
+    def _decode_session(self, data):
+        data['lead_agent'] = LeadAgent.from_state(data['lead_agent'])
+        return data
+    
+    def get_session(self, session_id):
+        """Current session state, or None"""
+        session, _ = self.session_store.get(session_id)
+        return session
+    
+    def get_build_job(self, session):
+        """The build job this session started, or None (jobs from before a reset don't count)"""
+        job_id = session.get('build_job_id')
+        return self.jobs.get(job_id) if job_id else None
+    
+    def reset_session(self, session_id):
+        self.session_store.delete(session_id)
+    
+    def _run_build_phase(self, session, session_id, api_key):
+        """Run the post-footer backend and test steps as a concurrent task graph (build job)"""
+        print("\n" + "="*60)
+        print("🎉 FOOTER COMPLETED! AUTO-GENERATING BACKEND & TESTS")
+        print("="*60)
+        
+        combined_html = self.frontend_agent.combine_sections(session['frontend_code'])
+        
+        # Create detailed requirements for backend
+        website_type = session.get('website_type', 'general')
+        backend_requirements = f"""Create a production-ready Flask backend API for this {website_type} website.
+
+FRONTEND STRUCTURE:
+{combined_html[:1500]}
+
+REQUIRED FEATURES:
+1. Contact form endpoint (POST /api/contact) - validate name, email, message
+2. Newsletter subscription (POST /api/subscribe) - validate email
+3. CORS configuration for frontend
+4. Input validation and error handling
+5. JSON responses with proper status codes
+6. Health check endpoint (GET /api/health)
+
+Generate COMPLETE, PRODUCTION-READY Flask code that can run immediately."""
+        
+        def backend_api():
+            print("📡 Calling Backend Agent...")
+            return self.backend_agent.generate_api(
+                frontend_requirements=backend_requirements,
+                api_key=api_key
+            )
+        
+        def database_models():
+            return self.backend_agent.generate_database_models(
+                f"A {website_type} website backend storing contact form messages (name, email, message) and newsletter subscribers (email).",
+                api_key=api_key
+            )
+        
+        def test_frontend():
+            print("🧪 Running frontend tests...")
+            return self.test_agent.test_frontend(
+                html_code=combined_html,
+                requirements="Validate responsive design, accessibility, and functionality",
+                api_key=api_key
+            )
+        
+        def integration_guide(backend_api):
+            return self.backend_agent.integrate_with_frontend(combined_html, backend_api, api_key=api_key)
+        
+        def test_backend(backend_api):
+            return self.test_agent.test_backend(backend_api, BUILD_ENDPOINTS, api_key=api_key)
+        
+        def test_integration(backend_api):
+            return self.test_agent.test_integration(combined_html, backend_api, api_key=api_key)
+        
+        def store_results(backend_api, test_frontend):
+            if backend_api:
+                self.rag_manager.store_interaction(
+                    session_id=session_id,
+                    agent='backend',
+                    message="Auto-generated backend after footer completion",
+                    response=backend_api[:500],
+                    stage='backend_generation'
+                )
+            if test_frontend:
+                self.rag_manager.store_interaction(
+                    session_id=session_id,
+                    agent='test',
+                    message="Auto-ran tests after footer completion",
+                    response=format_report(test_frontend)[:500],
+                    stage='testing'
+                )
+        
+        graph = TaskGraph('footer_build')
+        graph.add('backend_api', backend_api)
+        graph.add('database_models', database_models)
+        graph.add('test_frontend', test_frontend)
+        graph.add('integration_guide', integration_guide, deps=['backend_api'])
+        graph.add('test_backend', test_backend, deps=['backend_api'])
+        graph.add('test_integration', test_integration, deps=['backend_api'])
+        graph.add('store_results', store_results, deps=['backend_api', 'test_frontend'])
+        results = graph.run(self.build_executor)
+        
+        backend_response = results.get('backend_api') or ''
+        backend_generated = bool(backend_response)
+        if backend_generated:
+            print(f"✅ Backend API generated: {len(backend_response)} characters")
+        else:
+            print("❌ Backend generation returned empty!")
+        
+        test_report = results.get('test_frontend')
+        test_result = format_report(test_report, test_report['narrative']) if test_report else ''
+        if test_report:
+            summary = test_report['summary']
+            print(f"✅ Tests completed: score {summary['score']} ({summary['errors']} errors, {summary['warnings']} warnings)")
+        else:
+            print("❌ Frontend tests failed to run!")
+        
+        outputs = {
+            'backend_code': backend_response,
+            'test_results': test_result,
+            'test_report': test_report,
+            'database_models': results.get('database_models', ''),
+            'integration_guide': results.get('integration_guide', ''),
+            'backend_test_results': results.get('test_backend', ''),
+            'integration_test_results': results.get('test_integration', ''),
+            'build_timings': graph.summary()
+        }
+        def merge_build(stored):
+            if stored.get('session_tag') != session['session_tag']:
+                # /api/reset ran while this built; the outputs belong to the old site
+                print(f"⚠️ Session {session_id} was reset during its build, discarding the outputs")
+                return False
+            stored.update(outputs)
+        
+        if self.session_store.update(session_id, merge_build) is None:
+            # Fails the job, so nothing reports a download for the new session
+            raise RuntimeError("Session was reset during the build; outputs discarded")
+        if backend_generated:
+            self.session_store.publish(session_id, 'backend_ready', {'length': len(backend_response)})
+        self.session_store.publish(session_id, 'tests_ready', {
+            'frontend': bool(test_result),
+            'frontend_score': test_report['summary']['score'] if test_report else None,
+            'backend': bool(outputs['backend_test_results']),
+            'integration': bool(outputs['integration_test_results'])
+        })
+        
+        print("="*60)
+        print(f"📊 SUMMARY:")
+        print(f"   Frontend: {len(combined_html)} chars")
+        print(f"   Backend: {len(backend_response)} chars")
+        print(f"   Tests: {len(test_result)} chars")
+        print(f"   Wall time: {graph.wall_time:.1f}s (serial: {outputs['build_timings']['serial_time']:.1f}s)")
+        for name, timing in graph.timings.items():
+            print(f"   - {name}: {timing['status']} in {timing['duration']:.2f}s")
+        print("="*60 + "\n")
+        
+        if not backend_generated:
+            raise RuntimeError("Backend generation returned empty")
+        
+        return outputs['build_timings']
+    
+    def _publish_build_finished(self, session_id, job, session_tag):
+        session = self.get_session(session_id)
+        if session is None or session.get('session_tag') != session_tag:
+            return  # Reset meanwhile; the new session never asked for this build
+        if job['status'] == 'done':
+            self.session_store.publish(session_id, 'download_ready', {'job_id': job['id']})
+        else:
+            self.session_store.publish(session_id, 'build_failed', {'job_id': job['id'], 'error': job['error']})
+    
+    def _generate_section(self, section, requirements, existing_code, api_key):
+        """Generate a section, reusing HTML from a near-duplicate earlier brief if one exists"""
+        # Keyed by the earlier sections' design too, so one site's brand never
+        # leaks into another's
+        context = build_design_context(existing_code)
+        cached_html = self.section_cache.lookup(section, requirements, context)
+        if cached_html:
+            return {
+                'response': cached_html,
+                'code': {'html': cached_html},
+                'section': section
+            }
+        
+        frontend_result = self.frontend_agent.generate_section(
+            section, requirements, existing_code, api_key
+        )
+        if frontend_result and 'code' in frontend_result:
+            self.section_cache.store(section, requirements, frontend_result['code'].get('html', ''), context)
+        return frontend_result
+    
     def _determine_section(self, stage):
         stage_to_section = {
             'header': 'header',
@@ -204,55 +576,94 @@ Generate COMPLETE, PRODUCTION-READY Flask code that can run immediately."""
         }
         return stage_to_section.get(stage, 'header')
     
-    def get_preview_code(self, session_id):
-        if session_id not in self.sessions:
-            return {'html': '', 'css': '', 'js': ''}
-        
-        frontend_code = self.sessions[session_id].get('frontend_code', {})
+    @staticmethod
+    def preview_etag(session):
+        """Opaque tag for the session's current content version"""
+        return f"{session.get('session_tag', 'legacy')}-{session.get('content_version', 0)}"
+    
+    def _combined_html(self, session_id, session):
+        """Memoized combine_sections for the session's current content version"""
+        key = (session_id, self.preview_etag(session))
+        with self._previews_lock:
+            html = self._previews.get(key)
+            if html is not None:
+                self._previews.move_to_end(key)
+                return html
         
-        # Debug: Show what sections we have
-        print(f"🔍 Preview requested - Available sections: {list(frontend_code.keys())}")
-        for section, code in frontend_code.items():
-            print(f"   - {section}: {len(code)} characters")
-            if len(code) < 50:
-                print(f"     ⚠️ Section too short! Content: {code[:100]}")
+        html = self.frontend_agent.combine_sections(session.get('frontend_code', {}))
+        with self._previews_lock:
+            self._previews[key] = html
+            while len(self._previews) > self.preview_cache_entries:
+                self._previews.popitem(last=False)
+        return html
+    
+    def get_preview_code(self, session_id, known_etags=()):
+        """Combined preview with its version; html is None if the caller's ETag is current"""
+        session = self.get_session(session_id)
+        if session is None:
+            return {'html': '', 'css': '', 'js': '', 'version': 0, 'etag': None}
         
-        combined_html = self.frontend_agent.combine_sections(frontend_code)
-        print(f"📄 Combined HTML length: {len(combined_html)} characters")
+        etag = self.preview_etag(session)
+        version = session.get('content_version', 0)
+        if etag in known_etags:
+            return {'html': None, 'css': None, 'js': None, 'version': version, 'etag': etag}
         
-        return {'html': combined_html, 'css': '', 'js': ''}
+        combined_html = self._combined_html(session_id, session)
+        return {'html': combined_html, 'css': '', 'js': '', 'version': version, 'etag': etag}
     
     def generate_download_package(self, session_id):
-        import zipfile, io, os
-        if session_id not in self.sessions:
+        session = self.get_session(session_id)
+        if session is None:
             return None
-        session = self.sessions[session_id]
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add frontend code
-            frontend_code = session.get('frontend_code', {})
-            combined_html = self.frontend_agent.combine_sections(frontend_code)
-            zip_file.writestr('frontend/index.html', combined_html)
-            
-            # Add backend code if available
-            backend_code = session.get('backend_code', '')
-            if backend_code:
-                zip_file.writestr('backend/app.py', backend_code)
-                zip_file.writestr('backend/requirements.txt', 'flask==3.0.0\nflask-cors==4.0.0\n')
-                zip_file.writestr('backend/.env.example', '# Add your environment variables here\nFLASK_ENV=development\n')
-            
-            # Add test results if available
-            test_results = session.get('test_results', '')
-            if test_results:
-                zip_file.writestr('TEST_RESULTS.md', f"""# Test Results
+        entries = []
+        
+        # Add frontend code
+        combined_html = self._combined_html(session_id, session)
+        entries.append(('frontend/index.html', combined_html))
+        
+        # Add backend code if available
+        backend_code = session.get('backend_code', '')
+        if backend_code:
+            entries.append(('backend/app.py', backend_code))
+            entries.append(('backend/requirements.txt', 'flask==3.0.0\nflask-cors==4.0.0\n'))
+            entries.append(('backend/.env.example', '# Add your environment variables here\nFLASK_ENV=development\n'))
+        
+        database_models = session.get('database_models', '')
+        if database_models:
+            entries.append(('backend/MODELS.md', database_models))
+        
+        integration_guide = session.get('integration_guide', '')
+        if integration_guide:
+            entries.append(('INTEGRATION.md', integration_guide))
+        
+        # Add test results if available
+        test_results = session.get('test_results', '')
+        if test_results:
+            backend_tests = session.get('backend_test_results', '')
+            integration_tests = session.get('integration_test_results', '')
+            entries.append(('TEST_RESULTS.md', f"""# Test Results
+
+## Frontend
 
 {test_results}
 
+## Backend
+
+{backend_tests or 'Not run'}
+
+## Integration
+
+{integration_tests or 'Not run'}
+
 Generated by AIDevs Test Agent
-""")
-            
-            # Create comprehensive README
-            readme = """# AIDevs Website Package
+"""))
+        
+        test_report = session.get('test_report')
+        if test_report:
+            entries.append(('TEST_REPORT.json', json.dumps(test_report, indent=2, ensure_ascii=False)))
+        
+        # Create comprehensive README
+        readme = """# AIDevs Website Package
 
 ## 📁 Project Structure
 ```
@@ -317,12 +728,7 @@ Check `TEST_RESULTS.md` for comprehensive quality assurance report.
 **Generated by AIDevs** - Your AI-powered development assistant
 Visit: https://aidevs.example.com
 """
-            zip_file.writestr('README.md', readme)
-        
-        # Save to downloads folder
-        zip_filename = f'aidevs_{session_id}.zip'
-        zip_path = os.path.join('downloads', zip_filename)
-        os.makedirs('downloads', exist_ok=True)
-        with open(zip_path, 'wb') as f:
-            f.write(zip_buffer.getvalue())
-        return zip_filename
+        entries.append(('README.md', readme))
+        
+        # Identical contents map to the same stored zip, so repeat downloads skip the deflate
+        return self.artifacts.get_or_build(entries)
@@ -1,5 +1,10 @@
 """Test Engineer Agent - Validates functionality and quality"""
+import json
+import os
 from .base_agent import BaseAgent
+from utils.cpu_pool import cpu_pool
+from utils.html_analyzer import analyze_html
+from utils.rate_limiter import LLMError
 
 TEST_SYSTEM_PROMPT = """You are a Test Engineer for AIDevs, responsible for comprehensive quality assurance.
 
@@ -70,6 +75,8 @@ RECOMMENDATIONS:
 """
 
 class TestAgent(BaseAgent):
+    cache_responses = True  # Narratives are built from deterministic reports
+    
     def __init__(self):
         super().__init__(
             name="Test Engineer",
@@ -77,20 +84,32 @@ class TestAgent(BaseAgent):
             system_prompt=TEST_SYSTEM_PROMPT
         )
     
-    def test_frontend(self, html_code, requirements):
-        """Test frontend code against requirements"""
-        prompt = f"""Test this frontend code:
+    def test_frontend(self, html_code, requirements, api_key=None, narrative=None):
+        """Static quality report for the frontend; the LLM only writes an optional summary"""
+        # Deterministic and takes milliseconds, but still CPU work off the event loop
+        report = cpu_pool.run(analyze_html, html_code)
+        
+        if narrative is None:
+            narrative = os.getenv('TEST_LLM_NARRATIVE', 'false').lower() == 'true'
+        report['narrative'] = ''
+        if narrative:
+            prompt = f"""Summarize this automated frontend test report for the site owner:
 
-{html_code}
+{json.dumps({'summary': report['summary'], 'checks': report['checks']})}
 
 Requirements to validate:
 {requirements}
 
-Provide detailed test results."""
+In 3-5 sentences: overall quality, then the most important fixes in priority order."""
+            try:
+                report['narrative'] = self.generate_response(prompt, api_key=api_key)
+            except LLMError as e:
+                # The report stands on its own without the summary
+                print(f"⚠️ Test narrative skipped: {e}")
         
-        return self.generate_response(prompt)
+        return report
     
-    def test_backend(self, api_code, endpoints):
+    def test_backend(self, api_code, endpoints, api_key=None):
         """Test backend API functionality"""
         prompt = f"""Test this Flask backend:
 
@@ -101,9 +120,9 @@ Expected endpoints:
 
 Check error handling, validation, and responses."""
         
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, api_key=api_key)
     
-    def test_integration(self, frontend_code, backend_code):
+    def test_integration(self, frontend_code, backend_code, api_key=None):
         """Test full-stack integration"""
         prompt = f"""Test integration between:
 
@@ -115,9 +134,9 @@ Backend:
 
 Verify data flow, error handling, and user experience."""
         
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, api_key=api_key)
     
-    def validate_accessibility(self, html_code):
+    def validate_accessibility(self, html_code, api_key=None):
         """Check accessibility compliance"""
         prompt = f"""Validate accessibility of this HTML:
 
@@ -125,4 +144,4 @@ Verify data flow, error handling, and user experience."""
 
 Check ARIA labels, semantic HTML, keyboard navigation, and WCAG compliance."""
         
-        return self.generate_response(prompt)
+        return self.generate_response(prompt, api_key=api_key)
@@ -1,5 +1,5 @@
 """Flask Backend API for AIDevs"""
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 from flask_jwt_extended import (
     JWTManager, create_access_token, 
@@ -7,42 +7,59 @@ from flask_jwt_extended import (
 )
 from dotenv import load_dotenv
 import os
+import json
+import math
+import queue
+import time
 from datetime import timedelta
 from agents.orchestrator import AIDevsOrchestrator
 from utils.rag_manager import RAGManager
 from utils.auth_manager import AuthManager
-from concurrent.futures import ThreadPoolExecutor
-import asyncio
-from functools import wraps
+from utils.user_store import UserStore
+from utils.groq_pool import client_pool
+from utils.llm_cache import llm_cache
+from utils.cpu_pool import cpu_pool
+from utils.design_context import token_counter
+from utils.concurrency import ConcurrencyLimiter, ServerBusyError, spawn
+from utils.rate_limiter import rate_limiter, LLMError, LLMUnavailableError, RateLimitedError
+from utils.session_store import SessionConflictError
+from utils.key_pool import key_pool, mask_key
 
 # Load environment variables
 load_dotenv()
+key_pool.load()  # Built at import time, before .env was read
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag"])  # Preview revalidation reads the ETag cross-origin
 
 # ===== CONCURRENCY & PARALLELISM ARCHITECTURE =====
-# Thread pool for non-blocking I/O operations
-executor = ThreadPoolExecutor(max_workers=10)
-
-def async_route(f):
-    """Decorator to run routes asynchronously using thread pool"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        return executor.submit(f, *args, **kwargs).result()
-    return decorated_function
+# Requests run on gevent greenlets (see gunicorn.conf.py); Groq and Chroma I/O
+# yield to the hub instead of pinning an OS thread. The limiter bounds how many
+# chat turns a worker runs at once and queues the rest.
+chat_limiter = ConcurrencyLimiter()
 # ==================================================
 
 # JWT Configuration
 app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'aidevs-secret-key-change-in-production')
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
+app.config['JWT_TOKEN_LOCATION'] = ['headers']
 jwt = JWTManager(app)
 
 # Initialize orchestrator and RAG
 rag_manager = RAGManager()
-auth_manager = AuthManager(rag_manager)
+user_store = UserStore()
+auth_manager = AuthManager(user_store)
+
+# One-time import of accounts from the legacy ChromaDB users collection
+if user_store.count() == 0 and rag_manager.users_collection.count() > 0:
+    migrated, skipped = user_store.migrate_from_collection(rag_manager.users_collection)
+    print(f"✅ Migrated {migrated} users from ChromaDB ({skipped} skipped)")
 orchestrator = AIDevsOrchestrator(rag_manager)
 
+# Open the server keys' connections before the first chat turn needs them
+for server_key in key_pool.keys:
+    client_pool.prewarm(server_key)
+
 @app.route('/api/auth/register', methods=['POST'])
 def register():
     """Register new user"""
@@ -113,6 +130,26 @@ def login():
             'error': str(e)
         }), 500
 
+@app.route('/api/auth/api-key', methods=['POST'])
+@jwt_required()
+def rotate_api_key():
+    """Replace the logged-in user's Groq API key"""
+    try:
+        username = get_jwt_identity()
+        data = request.json
+        api_key = data.get('apiKey', '').strip()
+        
+        result = auth_manager.rotate_api_key(username, api_key)
+        if result['success']:
+            return jsonify(result)
+        return jsonify(result), 400
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/api/auth/validate-password', methods=['POST'])
 def validate_password():
     """Validate password in real-time"""
@@ -129,6 +166,37 @@ def validate_password():
             'error': str(e)
         }), 500
 
+def resolve_api_key(username):
+    """Return (api_key, using_default) for a user; None means agents lease server keys from key_pool"""
+    user_api_key = auth_manager.get_user_api_key(username)
+    
+    if not user_api_key:
+        # Fallback to the server key pool (GROQ_API_KEYS / GROQ_API_KEY)
+        print(f"⚠️  User {username} has no API key - using the server key pool ({len(key_pool.keys)} keys)")
+        return None, True
+    
+    print(f"✅ Using {username}'s PERSONAL Groq API key: {mask_key(user_api_key)}")
+    return user_api_key, False
+
+def llm_error_body(e):
+    """(body, status) for a failed LLM call: 429 out of quota, 503 Groq down, 502 rejected"""
+    body = {'success': False, 'error': str(e)}
+    if isinstance(e, RateLimitedError):
+        if e.retry_after:
+            body['retry_after'] = math.ceil(e.retry_after)
+        return body, 429
+    return body, 503 if isinstance(e, LLMUnavailableError) else 502
+
+# Two turns for one session raced; the loser saved nothing
+CONFLICT_MESSAGE = 'Another message updated this conversation at the same time'
+
+def read_idempotency_key():
+    """(key, None) from the optional Idempotency-Key header, or (None, 400 response)"""
+    key = request.headers.get('Idempotency-Key', '').strip()
+    if len(key) > 128:
+        return None, (jsonify({'success': False, 'error': 'Idempotency-Key is too long'}), 400)
+    return key or None, None
+
 @app.route('/api/chat', methods=['POST'])
 @jwt_required()
 def chat():
@@ -138,18 +206,9 @@ def chat():
         username = get_jwt_identity()
         
         # Get user's API key
-        user_api_key = auth_manager.get_user_api_key(username)
-        using_default = False
+        user_api_key, using_default = resolve_api_key(username)
         
-        if not user_api_key:
-            # Fallback to default API key from .env
-            user_api_key = os.getenv('GROQ_API_KEY')
-            using_default = True
-            print(f"⚠️  User {username} has no API key - using DEFAULT Groq key")
-        else:
-            print(f"✅ Using {username}'s PERSONAL Groq API key: {user_api_key[:20]}...")
-        
-        if not user_api_key:
+        if not user_api_key and not key_pool.keys:
             print(f"ERROR: No API key available for user {username}")
             return jsonify({
                 'success': False,
@@ -166,18 +225,43 @@ def chat():
                 'error': 'Message is required'
             }), 400
 
+        idempotency_key, error = read_idempotency_key()
+        if error:
+            return error
+
         # Process message through orchestrator with user's API key
-        response = orchestrator.process_message(
-            user_message, session_id, user_api_key
-        )
+        with chat_limiter:
+            response = orchestrator.process_message(
+                user_message, session_id, user_api_key,
+                idempotency_key=idempotency_key
+            )
 
         return jsonify({
             'success': True,
             'response': response['message'],
             'stage': response['stage'],
             'has_preview': response['has_preview'],
+            'preview_version': response['preview_version'],
+            'jobs': response['jobs'],  # Background build jobs to poll via /api/status
+            'replayed': response['replayed'],  # Answered by an earlier or concurrent identical send
             'using_default_key': using_default  # Tell frontend which key is being used
         })
+    except ServerBusyError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except SessionConflictError:
+        return jsonify({
+            'success': False,
+            'error': CONFLICT_MESSAGE
+        }), 409
+    except LLMError as e:
+        body, status = llm_error_body(e)
+        response = jsonify(body)
+        if 'retry_after' in body:
+            response.headers['Retry-After'] = str(body['retry_after'])
+        return response, status
     except Exception as e:
         import traceback
         print("ERROR in /api/chat:")
@@ -187,44 +271,171 @@ def chat():
             'error': str(e)
         }), 500
 
-@app.route('/api/preview', methods=['POST'])
+@app.route('/api/chat/stream', methods=['POST'])
+@jwt_required()
+def chat_stream():
+    """Handle chat messages with Server-Sent Events (tokens, stages, sections)"""
+    username = get_jwt_identity()
+    user_api_key, using_default = resolve_api_key(username)
+    
+    if not user_api_key and not key_pool.keys:
+        print(f"ERROR: No API key available for user {username}")
+        return jsonify({
+            'success': False,
+            'error': 'No API key configured'
+        }), 401
+    
+    data = request.json or {}
+    user_message = data.get('message', '')
+    session_id = f"{username}_session"
+    
+    if not user_message:
+        return jsonify({
+            'success': False,
+            'error': 'Message is required'
+        }), 400
+    
+    idempotency_key, error = read_idempotency_key()
+    if error:
+        return error
+    
+    try:
+        chat_limiter.acquire()
+    except ServerBusyError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    
+    events = queue.Queue()
+    
+    def run_turn():
+        try:
+            response = orchestrator.process_message(
+                user_message, session_id, user_api_key,
+                on_event=lambda event, payload: events.put((event, payload)),
+                idempotency_key=idempotency_key
+            )
+            events.put(('done', {
+                'success': True,
+                'response': response['message'],
+                'stage': response['stage'],
+                'has_preview': response['has_preview'],
+                'preview_version': response['preview_version'],
+                'jobs': response['jobs'],
+                'replayed': response['replayed'],
+                'using_default_key': using_default
+            }))
+        except SessionConflictError:
+            events.put(('error', {'success': False, 'error': CONFLICT_MESSAGE, 'status': 409}))
+        except LLMError as e:
+            body, status = llm_error_body(e)
+            events.put(('error', dict(body, status=status)))
+        except Exception as e:
+            events.put(('error', {'success': False, 'error': str(e)}))
+        finally:
+            chat_limiter.release()
+            events.put(None)
+    
+    spawn(run_turn)
+    
+    def generate():
+        while True:
+            try:
+                item = events.get(timeout=15)
+            except queue.Empty:
+                # Keep proxies from closing the connection during long sections
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            event, payload = item
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/events', methods=['GET'])
+# EventSource can't send headers, so only this stream takes the token as ?jwt=
+@jwt_required(locations=['headers', 'query_string'])
+def session_events():
+    """Server-Sent Events: section_stored, backend_ready, tests_ready, download_ready, build_failed"""
+    username = get_jwt_identity()
+    session_id = f"{username}_session"
+    store = orchestrator.session_store
+    
+    # Resume after the last event the client saw; a fresh client only gets new events
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('after')
+    after_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else store.latest_event_id(session_id)
+    max_seconds = float(os.getenv('EVENTS_STREAM_MAX_SECONDS', 300))
+    
+    def generate():
+        nonlocal after_id
+        # Tell EventSource how soon to reconnect once this stream is recycled
+        yield "retry: 2000\n\n"
+        deadline = time.monotonic() + max_seconds
+        while time.monotonic() < deadline:
+            events = store.wait_for_events(session_id, after_id, timeout=15)
+            if not events:
+                # Keep proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event, payload in events:
+                after_id = event_id
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/preview', methods=['GET', 'POST'])
 @jwt_required()
 def get_preview():
-    """Get current website preview code"""
+    """Get current website preview code (304 if If-None-Match is still current)"""
     try:
         username = get_jwt_identity()
         session_id = f"{username}_session"
-        preview_code = orchestrator.get_preview_code(session_id)
+        preview_code = orchestrator.get_preview_code(session_id, request.if_none_match)
 
-        return jsonify({
-            'success': True,
-            'html': preview_code.get('html', ''),
-            'css': preview_code.get('css', ''),
-            'js': preview_code.get('js', '')
-        })
+        if preview_code['html'] is None:
+            response = Response(status=304)
+        else:
+            response = jsonify({
+                'success': True,
+                'html': preview_code.get('html', ''),
+                'css': preview_code.get('css', ''),
+                'js': preview_code.get('js', ''),
+                'version': preview_code['version']
+            })
+        if preview_code['etag']:
+            response.set_etag(preview_code['etag'])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/download', methods=['POST'])
+@app.route('/api/download', methods=['GET', 'POST'])
 @jwt_required()
 def download_code():
-    """Generate and return downloadable zip file"""
+    """Return the downloadable zip (GET supports If-None-Match and Range)"""
     try:
         username = get_jwt_identity()
         session_id = f"{username}_session"
         
         # Check if session exists and has backend code
-        if session_id not in orchestrator.sessions:
+        session = orchestrator.get_session(session_id)
+        if session is None:
             return jsonify({
                 'success': False,
                 'error': 'No active session. Please build your website first.'
             }), 404
         
-        session = orchestrator.sessions[session_id]
-        backend_code = session.get('backend_code', '')
         frontend_code = session.get('frontend_code', {})
         
         # Validate that we have both frontend and backend
@@ -234,29 +445,35 @@ def download_code():
                 'error': 'No frontend code available. Please build your website first.'
             }), 400
         
-        if not backend_code or len(backend_code) < 100:
+        build_job = orchestrator.get_build_job(session)
+        if not build_job or build_job['status'] != 'done':
             return jsonify({
                 'success': False,
                 'error': 'Backend code is still being generated. Please wait for the complete build to finish.',
-                'backend_ready': False
+                'backend_ready': False,
+                'job': build_job
             }), 400
         
-        zip_filename = orchestrator.generate_download_package(session_id)
+        artifact = orchestrator.generate_download_package(session_id)
 
-        if not zip_filename:
+        if not artifact:
             return jsonify({
                 'success': False,
                 'error': 'Failed to generate download package'
             }), 500
 
-        zip_path = os.path.join('downloads', zip_filename)
-        
-        return send_file(
-            zip_path,
+        # The artifact key is a content hash, so it doubles as a strong ETag
+        response = send_file(
+            artifact['path'],
             mimetype='application/zip',
             as_attachment=True,
-            download_name=zip_filename
+            download_name=f'aidevs_{session_id}.zip',
+            conditional=True,
+            etag=artifact['key'],
+            max_age=0
         )
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     except Exception as e:
         import traceback
         print("ERROR in /api/download:")
@@ -274,21 +491,22 @@ def get_status():
         username = get_jwt_identity()
         session_id = f"{username}_session"
         
-        if session_id not in orchestrator.sessions:
+        session = orchestrator.get_session(session_id)
+        if session is None:
             return jsonify({
                 'success': True,
                 'has_session': False,
                 'frontend_ready': False,
                 'backend_ready': False,
-                'download_ready': False
+                'download_ready': False,
+                'preview_version': 0
             })
         
-        session = orchestrator.sessions[session_id]
         frontend_code = session.get('frontend_code', {})
-        backend_code = session.get('backend_code', '')
+        build_job = orchestrator.get_build_job(session)
         
         has_frontend = bool(frontend_code)
-        has_backend = bool(backend_code and len(backend_code) > 100)
+        has_backend = bool(build_job and build_job['status'] == 'done')
         download_ready = has_frontend and has_backend
         
         return jsonify({
@@ -298,7 +516,9 @@ def get_status():
             'backend_ready': has_backend,
             'download_ready': download_ready,
             'current_stage': session.get('current_stage', 'initial'),
-            'sections_completed': list(frontend_code.keys())
+            'sections_completed': list(frontend_code.keys()),
+            'preview_version': session.get('content_version', 0),
+            'jobs': orchestrator.jobs.list_for_session(session_id)
         })
     except Exception as e:
         return jsonify({
@@ -315,8 +535,8 @@ def reset_session():
         session_id = f"{username}_session"
         
         # Clear from orchestrator
-        if session_id in orchestrator.sessions:
-            del orchestrator.sessions[session_id]
+        orchestrator.reset_session(session_id)
+        orchestrator.jobs.clear_session(session_id)
         
         # Clear from RAG
         rag_manager.clear_session(session_id)
@@ -331,34 +551,72 @@ def reset_session():
             'error': str(e)
         }), 500
 
+def is_admin(username):
+    admins = [name.strip() for name in os.getenv('ADMIN_USERS', '').split(',') if name.strip()]
+    return username in admins
+
+@app.route('/api/admin/sessions', methods=['GET'])
+@jwt_required()
+def admin_sessions():
+    """Per-session size accounting (ADMIN_USERS only)"""
+    if not is_admin(get_jwt_identity()):
+        return jsonify({'success': False, 'error': 'Admin access required'}), 403
+
+    try:
+        stats = orchestrator.session_store.get_stats()
+        stats['sessions'].sort(key=lambda entry: entry['bytes'], reverse=True)
+        return jsonify({'success': True, **stats})
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/admin/keys', methods=['GET'])
+@jwt_required()
+def admin_keys():
+    """Per-key health, load and quota of the server key pool (ADMIN_USERS only)"""
+    if not is_admin(get_jwt_identity()):
+        return jsonify({'success': False, 'error': 'Admin access required'}), 403
+    return jsonify({'success': True, **key_pool.get_stats(per_key=True)})
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
         'service': 'AIDevs Backend',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'groq_pool': client_pool.get_stats(),
+        'llm_cache': llm_cache.get_stats(),
+        'section_cache': orchestrator.section_cache.get_stats(),
+        'rag_writes': rag_manager.get_write_stats(),
+        'api_key_cache': auth_manager.key_cache.get_stats(),
+        'cpu_pool': cpu_pool.get_stats(),
+        'concurrency': chat_limiter.get_stats(),
+        'artifacts': orchestrator.artifacts.get_stats(),
+        'turns': orchestrator.get_turn_stats(),
+        'rate_limiter': rate_limiter.get_stats(),
+        'key_pool': key_pool.get_stats(),
+        'turn_flights': orchestrator.turn_flights.get_stats(),
+        'design_context': token_counter.get_stats()
     })
 
 if __name__ == '__main__':
-    # Create downloads directory if it doesn't exist
-    os.makedirs('downloads', exist_ok=True)
-    
     # Get port from environment variable (for Render) or use 5000
     port = int(os.getenv('PORT', 5000))
     
     print("=" * 60)
     print("🚀 AIDevs Backend - High-Performance Architecture")
     print("=" * 60)
-    print("✅ Concurrency: ThreadPoolExecutor with 10 workers")
-    print("✅ Non-blocking I/O: Async route handling")
-    print("✅ Event-driven: Flask with multi-threaded request handling")
-    print("✅ Load balancing ready: Production deployment with Gunicorn/uWSGI")
+    print(f"✅ Concurrency: up to {chat_limiter.limit} chat turns per worker")
+    print("✅ Event-driven: Flask with multi-threaded request handling (dev server)")
+    print("✅ Non-blocking I/O: gevent workers via gunicorn -c gunicorn.conf.py")
     print(f"✅ Running on port: {port}")
     print("=" * 60)
     
     # Run Flask server with multi-threaded support
-    # In production, use: gunicorn -w 4 -k gevent --worker-connections 1000 app:app
+    # In production, use: gunicorn -c gunicorn.conf.py app:app
     app.run(
         debug=os.getenv('FLASK_ENV') != 'production',
         host='0.0.0.0', 
@@ -0,0 +1,104 @@
+"""Benchmark: fenced-code extraction, legacy str.find scans vs the single-pass parser
+
+Runs over corpus/llm_responses.jsonl (responses in the shapes the lead,
+frontend, backend and test agents get back). Measures whole-response
+extraction and a streaming preview, where the legacy approach has to
+re-scan the accumulated text on every chunk.
+
+Run from backend/:  python benchmarks/bench_code_parser.py
+"""
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.code_parser import FencedCodeParser, parse_code_blocks
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'llm_responses.jsonl')
+ROUNDS = int(os.getenv('BENCH_ROUNDS', 200))
+CHUNK_CHARS = int(os.getenv('BENCH_CHUNK_CHARS', 24))  # Roughly one streamed token delta
+
+
+def legacy_extract(response):
+    """The previous BaseAgent.extract_code scans (without its debug prints)"""
+    code_blocks = {}
+    if "```html" in response:
+        start = response.find("```html") + 7
+        end = response.find("```", start)
+        if end > start:
+            code_blocks['html'] = response[start:end].strip()
+    elif "```" in response:
+        start = response.find("```") + 3
+        if response[start:start + 1] == '\n':
+            start += 1
+        end = response.find("```", start)
+        if end > start:
+            content = response[start:end].strip()
+            if '<' in content and '>' in content:
+                code_blocks['html'] = content
+    elif '<style>' in response or '<script>' in response or '<section' in response or '<header' in response or '<footer' in response:
+        code_blocks['html'] = response.strip()
+    for key, markers in (('css', ("```css",)), ('js', ("```javascript", "```js")), ('python', ("```python",))):
+        for marker in markers:
+            if marker in response:
+                start = response.find(marker) + len(marker)
+                end = response.find("```", start)
+                if end > start:
+                    code_blocks[key] = response[start:end].strip()
+                break
+    return code_blocks
+
+
+def load_corpus():
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def timed(fn, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (rounds * len(texts)) * 1e6
+
+
+def legacy_streaming(text):
+    """Re-extract on every chunk, as a streaming preview would have to"""
+    for end in range(CHUNK_CHARS, len(text) + CHUNK_CHARS, CHUNK_CHARS):
+        legacy_extract(text[:end])
+
+
+def parser_streaming(text):
+    parser = FencedCodeParser()
+    for start in range(0, len(text), CHUNK_CHARS):
+        parser.feed(text[start:start + CHUNK_CHARS])
+        parser.partial()
+    parser.close()
+
+
+def main():
+    corpus = load_corpus()
+    texts = [entry['response'] for entry in corpus]
+    print(f"Corpus: {len(texts)} responses, {sum(len(t) for t in texts) / 1024:.1f} KB")
+
+    print("\nBlocks found per response (legacy keys -> parser blocks):")
+    for entry in corpus:
+        legacy = sorted(legacy_extract(entry['response']))
+        blocks = parse_code_blocks(entry['response'])
+        found = ', '.join(f"{b.language or '?'}{'' if b.closed else '(open)'}" for b in blocks) or '-'
+        print(f"   {entry['name']:<24} {','.join(legacy) or '-':<18} {found}")
+
+    rows = [
+        ('whole response', timed(legacy_extract, texts, ROUNDS), timed(parse_code_blocks, texts, ROUNDS)),
+        (f'streamed ({CHUNK_CHARS}-char chunks)', timed(legacy_streaming, texts, max(ROUNDS // 20, 1)),
+         timed(parser_streaming, texts, max(ROUNDS // 20, 1))),
+    ]
+    print(f"\n{'':<28}{'legacy µs':>12}{'parser µs':>12}{'speedup':>10}")
+    for name, legacy_us, parser_us in rows:
+        print(f"{name:<28}{legacy_us:>12.1f}{parser_us:>12.1f}{legacy_us / parser_us:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
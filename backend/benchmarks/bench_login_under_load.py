@@ -0,0 +1,121 @@
+"""Benchmark: login latency under concurrent chat load, inline vs hub threadpool vs CPU pool
+
+Simulates a gevent worker where chat greenlets deflate download packages and
+run Chroma queries (stood in for by blocking calls on the hub threadpool)
+while other greenlets log in (bcrypt verify). Inline, every CPU burst blocks
+the event loop; on the hub threadpool, logins queue behind the Chroma work;
+on the CPU pool they only queue behind other CPU work.
+
+Recorded on a 1-CPU host (BENCH_LOGINS=40, CPU_POOL_WORKERS=1):
+    inline, idle                 p50    410.3 ms   p99    446.9 ms
+    inline, under chat load      p50    405.4 ms   p99    490.4 ms
+    hub threadpool, idle         p50  11535.2 ms   p99  15564.1 ms
+    hub threadpool, under load   p50  12565.4 ms   p99  16652.5 ms
+    cpu pool, idle               p50   7920.1 ms   p99  15306.4 ms
+    cpu pool, under load         p50   9860.7 ms   p99  17961.3 ms
+With one core there is nothing to run the offloaded work on in parallel, so
+every login waits for all 40 bcrypt calls queued ahead of it; offloading does
+not improve login latency there. Re-run on the deployment's core count before
+drawing conclusions about p99.
+
+Run from backend/:  python benchmarks/bench_login_under_load.py
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import base64
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import gevent
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import cpu_tasks
+from utils.concurrency import offload
+from utils.cpu_pool import CPUPool
+
+CHAT_GREENLETS = int(os.getenv('BENCH_CHAT_GREENLETS', 8))
+LOGINS = int(os.getenv('BENCH_LOGINS', 60))
+PACKAGE_BYTES = int(os.getenv('BENCH_PACKAGE_BYTES', 2_000_000))
+CHROMA_GREENLETS = int(os.getenv('BENCH_CHROMA_GREENLETS', 40))
+CHROMA_QUERY_SECONDS = float(os.getenv('BENCH_CHROMA_QUERY_SECONDS', 0.05))
+
+
+def inline(fn, *args):
+    return fn(*args)
+
+
+def chat_load(run, stop, workdir, index, payload):
+    """One chat user repeatedly building a download package"""
+    zip_path = os.path.join(workdir, f"chat_{index}.zip")
+    entries = [('frontend/index.html', payload), ('README.md', payload[:10000])]
+    while not stop[0]:
+        run(cpu_tasks.write_zip, zip_path, entries)
+        gevent.sleep(0)
+
+
+def chroma_load(stop):
+    """One chat turn's RAG lookups: blocking C calls on the hub threadpool"""
+    while not stop[0]:
+        offload(time.sleep, CHROMA_QUERY_SECONDS)
+
+
+def login(run, hashed, latencies):
+    start = time.perf_counter()
+    run(cpu_tasks.check_password, "Password1!", hashed)
+    latencies.append((time.perf_counter() - start) * 1000)
+
+
+def bench(label, run, hashed, payload, with_load=True):
+    stop = [False]
+    latencies = []
+    with tempfile.TemporaryDirectory() as workdir:
+        loaders = []
+        if with_load:
+            loaders = [gevent.spawn(chat_load, run, stop, workdir, i, payload) for i in range(CHAT_GREENLETS)]
+            loaders += [gevent.spawn(chroma_load, stop) for _ in range(CHROMA_GREENLETS)]
+            gevent.sleep(0.5)
+
+        logins = []
+        for _ in range(LOGINS):
+            logins.append(gevent.spawn(login, run, hashed, latencies))
+            gevent.sleep(0.02)
+        gevent.joinall(logins)
+
+        stop[0] = True
+        gevent.joinall(loaders)
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:<28} p50 {p50:8.1f} ms   p99 {p99:8.1f} ms")
+    return p99
+
+
+def main():
+    hashed = cpu_tasks.hash_password("Password1!")
+    payload = base64.b64encode(os.urandom(PACKAGE_BYTES * 3 // 4)).decode()
+    threadpool = gevent.get_hub().threadpool
+    threadpool.maxsize = int(os.getenv('GEVENT_THREADPOOL_SIZE', 20))
+    pool = CPUPool()
+
+    print("=" * 60)
+    print(f"Login latency ({LOGINS} logins, {CHAT_GREENLETS} zip + {CHROMA_GREENLETS} Chroma greenlets, "
+          f"{threadpool.maxsize} hub threads, {pool.max_workers} CPU pool threads)")
+    print("=" * 60)
+    bench("inline, idle", inline, hashed, payload, with_load=False)
+    bench("inline, under chat load", inline, hashed, payload)
+    bench("hub threadpool, idle", offload, hashed, payload, with_load=False)
+    bench("hub threadpool, under load", offload, hashed, payload)
+    bench("cpu pool, idle", pool.run, hashed, payload, with_load=False)
+    bench("cpu pool, under load", pool.run, hashed, payload)
+    print("=" * 60)
+    print(f"CPU pool stats: {pool.get_stats()}")
+
+
+if __name__ == '__main__':
+    main()
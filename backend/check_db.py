@@ -1,4 +1,4 @@
-"""Check what's in the database"""
+"""Check what's in the legacy ChromaDB users collection"""
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -10,7 +10,7 @@ from utils.rag_manager import RAGManager
 from utils.auth_manager import AuthManager
 
 rag = RAGManager()
-auth = AuthManager(rag)
+auth = AuthManager(None)  # Only used for decryption
 
 # Get all users
 try:
@@ -1,4 +1,4 @@
-"""Check registered users in ChromaDB"""
+"""Check registered users in the user store"""
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -6,29 +6,29 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from dotenv import load_dotenv
 load_dotenv()
 
-from utils.rag_manager import RAGManager
+from utils.user_store import UserStore
 from utils.auth_manager import AuthManager
 
 # Initialize managers
-rag_manager = RAGManager()
-auth_manager = AuthManager(rag_manager)
+user_store = UserStore()
+auth_manager = AuthManager(user_store)
 
 print("=" * 60)
 print("CHECKING REGISTERED USERS")
 print("=" * 60)
 
 try:
-    # Get all documents from users collection
-    results = rag_manager.users_collection.get()
+    # Get all registered users
+    users = user_store.list_users()
     
-    if not results['ids'] or len(results['ids']) == 0:
+    if not users:
         print("\n❌ NO USERS REGISTERED YET!")
         print("\nPlease register at: http://localhost:3000/register")
     else:
-        print(f"\n✅ Found {len(results['ids'])} registered user(s):\n")
+        print(f"\n✅ Found {len(users)} registered user(s):\n")
         
-        for i, (user_id, metadata) in enumerate(zip(results['ids'], results['metadatas']), 1):
-            print(f"{i}. Username: {user_id}")
+        for i, metadata in enumerate(users, 1):
+            print(f"{i}. Username: {metadata['username']}")
             print(f"   Name: {metadata.get('first_name', '')} {metadata.get('last_name', '')}")
             print(f"   Registered: {metadata.get('registered_at', 'N/A')}")
             print(f"   Last Login: {metadata.get('last_login', 'N/A')}")
@@ -0,0 +1,34 @@
+"""Gunicorn settings for the gevent (cooperative I/O) serving mode"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# gevent workers monkey-patch sockets, so a chat request waiting on Groq or an
+# SSE stream costs a greenlet rather than an OS thread
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('WEB_CONCURRENCY', min(4, multiprocessing.cpu_count() * 2 + 1)))
+# Workers read this to pick a multi-process-safe Chroma mode (utils.rag_manager)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 2000))
+
+# Sections stream for a while; keep long turns and idle SSE streams alive
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+# Default format minus the query string: /api/events carries the JWT as ?jwt=
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_worker_init(worker):
+    # The hub threadpool runs blocking Chroma calls off the event loop, see
+    # utils.concurrency.offload; CPU work has its own pool (utils.cpu_pool)
+    try:
+        import gevent
+        gevent.get_hub().threadpool.maxsize = int(os.getenv('GEVENT_THREADPOOL_SIZE', 20))
+    except ImportError:
+        pass
@@ -0,0 +1,36 @@
+"""Migrate user accounts from the ChromaDB users collection into the SQLite user store"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from utils.rag_manager import RAGManager
+from utils.user_store import UserStore
+
+rag_manager = RAGManager()
+user_store = UserStore()
+
+print("=" * 60)
+print("MIGRATING USERS: ChromaDB -> SQLite")
+print("=" * 60)
+
+try:
+    legacy_count = rag_manager.users_collection.count()
+    print(f"\nChromaDB users: {legacy_count}")
+    print(f"SQLite users before: {user_store.count()}")
+    
+    migrated, skipped = user_store.migrate_from_collection(rag_manager.users_collection)
+    
+    print(f"\n✅ Migrated: {migrated}")
+    print(f"⏭️  Skipped (already present or invalid): {skipped}")
+    print(f"SQLite users after: {user_store.count()}")
+    print(f"Database: {os.path.abspath(user_store.db_path)}")
+
+except Exception as e:
+    print(f"\n❌ Migration failed: {str(e)}")
+    import traceback
+    traceback.print_exc()
+
+print("=" * 60)
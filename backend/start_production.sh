@@ -3,8 +3,11 @@
 # Install production dependencies
 pip install -r requirements.txt
 
+# Optional: share one ChromaDB store between all workers (set CHROMA_MODE=server)
+# chroma run --path ${CHROMA_PERSIST_DIRECTORY:-./chroma_db} --port ${CHROMA_PORT:-8000} &
+
 # Option 1: Run with Gunicorn (Event-driven, non-blocking I/O)
-gunicorn -w 4 -k gevent --worker-connections 1000 --bind 0.0.0.0:5000 app:app
+gunicorn -c gunicorn.conf.py app:app  # gevent workers, see gunicorn.conf.py
 
 # Option 2: Run with uWSGI (Thread pool)
 # uwsgi --http :5000 --wsgi-file app.py --callable app --threads 4 --processes 2
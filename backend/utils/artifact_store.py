@@ -0,0 +1,108 @@
+"""Content-addressed store for download packages with size/age eviction"""
+import hashlib
+import os
+import threading
+import time
+from .cpu_pool import cpu_pool
+from .cpu_tasks import write_zip
+
+
+class ArtifactStore:
+    def __init__(self, root=None, max_bytes=None, max_age=None):
+        """Zips named by the hash of their entries, so identical builds are built once"""
+        self.root = os.path.abspath(root or os.getenv('ARTIFACT_DIR', './downloads'))
+        self.max_bytes = max_bytes or int(os.getenv('ARTIFACT_STORE_MAX_MB', 500)) * 1024 * 1024
+        self.max_age = max_age or float(os.getenv('ARTIFACT_MAX_AGE', 7 * 24 * 3600))
+        os.makedirs(self.root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._builds_since_sweep = 0
+        self.stats = {'hits': 0, 'builds': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(entries):
+        """sha256 over every (name, content) entry, in order"""
+        digest = hashlib.sha256()
+        for name, content in entries:
+            digest.update(name.encode('utf-8'))
+            digest.update(b'\0')
+            digest.update(content.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.zip")
+
+    def get_or_build(self, entries):
+        """Return {'key', 'path', 'size', 'cached'} for the package, deflating it only on a miss"""
+        key = self.make_key(entries)
+        path = self.path(key)
+        try:
+            # Touch so eviction approximates LRU
+            os.utime(path, None)
+            cached = True
+        except FileNotFoundError:
+            cpu_pool.run(write_zip, path, entries)
+            cached = False
+
+        with self._lock:
+            self.stats['hits' if cached else 'builds'] += 1
+            if not cached:
+                self._builds_since_sweep += 1
+                sweep = self._builds_since_sweep >= 20
+                if sweep:
+                    self._builds_since_sweep = 0
+        if not cached and sweep:
+            self.sweep(keep=key)
+
+        return {'key': key, 'path': path, 'size': os.path.getsize(path), 'cached': cached}
+
+    def sweep(self, keep=None):
+        """Drop packages older than max_age, then the least recently used until under max_bytes"""
+        now = time.time()
+        files = []
+        total = 0
+        evicted = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name != f"{keep}.zip" and stat.st_mtime + self.max_age <= now:
+                evicted += self._remove(path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == self.path(keep):
+                continue
+            evicted += self._remove(path)
+            total -= size
+
+        with self._lock:
+            self.stats['evictions'] += evicted
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['files'] = stats['bytes'] = 0
+        for name in os.listdir(self.root):
+            try:
+                stats['bytes'] += os.path.getsize(os.path.join(self.root, name))
+                stats['files'] += 1
+            except OSError:
+                continue
+        stats['max_bytes'] = self.max_bytes
+        return stats
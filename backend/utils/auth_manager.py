@@ -1,18 +1,22 @@
 """Authentication Manager with JWT + bcrypt"""
-import bcrypt
 import re
 from datetime import datetime
 from cryptography.fernet import Fernet
 import os
+from utils.key_cache import APIKeyCache
+from utils.cpu_pool import cpu_pool
+from utils import cpu_tasks
 
 class AuthManager:
-    def __init__(self, rag_manager):
-        self.rag_manager = rag_manager
+    def __init__(self, user_store):
+        self.user_store = user_store
         # Get encryption key from environment
         encryption_key = os.getenv('ENCRYPTION_KEY')
         if not encryption_key:
             raise ValueError("ENCRYPTION_KEY not set in .env file")
         self.cipher = Fernet(encryption_key.encode())
+        # Decrypted keys for the /api/chat hot path
+        self.key_cache = APIKeyCache()
     
     def validate_password(self, password):
         """Validate password requirements"""
@@ -62,17 +66,12 @@ class AuthManager:
         return True, "Valid"
     
     def hash_password(self, password):
-        """Hash password using bcrypt"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
-        return hashed.decode('utf-8')
+        """Hash password using bcrypt (in the CPU pool)"""
+        return cpu_pool.run(cpu_tasks.hash_password, password)
     
     def verify_password(self, password, hashed_password):
-        """Verify password against hash"""
-        return bcrypt.checkpw(
-            password.encode('utf-8'), 
-            hashed_password.encode('utf-8')
-        )
+        """Verify password against hash (in the CPU pool)"""
+        return cpu_pool.run(cpu_tasks.check_password, password, hashed_password)
     
     def encrypt_api_key(self, api_key):
         """Encrypt API key for storage"""
@@ -120,8 +119,8 @@ class AuthManager:
         # Generate username
         username = self.generate_username(first_name, last_name)
         
-        # Check if user exists
-        existing_user = self.rag_manager.get_user(username)
+        # Check if user exists (cheap early exit before hashing)
+        existing_user = self.user_store.get_user(username)
         if existing_user:
             return {'success': False, 'error': 'User already exists. Please login.'}
         
@@ -129,7 +128,7 @@ class AuthManager:
         hashed_password = self.hash_password(password)
         encrypted_api_key = self.encrypt_api_key(api_key)
         
-        # Store user in ChromaDB
+        # Store user
         user_data = {
             'username': username,
             'first_name': first_name.strip(),
@@ -141,7 +140,10 @@ class AuthManager:
             'last_login': datetime.now().isoformat()
         }
         
-        self.rag_manager.store_user(user_data)
+        # Atomic insert-if-absent closes the race between concurrent registrations
+        if not self.user_store.create_user(user_data):
+            return {'success': False, 'error': 'User already exists. Please login.'}
+        self.key_cache.invalidate(username)
         
         return {
             'success': True,
@@ -152,7 +154,7 @@ class AuthManager:
     def login_user(self, username, password):
         """Authenticate user login"""
         # Get user from database
-        user = self.rag_manager.get_user(username)
+        user = self.user_store.get_user(username)
         
         if not user:
             return {'success': False, 'error': 'Invalid username or password'}
@@ -162,7 +164,7 @@ class AuthManager:
             return {'success': False, 'error': 'Invalid username or password'}
         
         # Update last login
-        self.rag_manager.update_last_login(username)
+        self.user_store.update_last_login(username)
         
         return {
             'success': True,
@@ -174,11 +176,35 @@ class AuthManager:
     
     def get_user_api_key(self, username):
         """Get decrypted API key for user"""
-        user = self.rag_manager.get_user(username)
+        # The cache is per worker; the stored key version tells it about
+        # rotations handled by other workers
+        version = self.user_store.get_api_key_version(username)
+        if version is None:
+            self.key_cache.invalidate(username)
+            return None
+        api_key = self.key_cache.get(username, version)
+        if api_key:
+            return api_key
+        
+        user = self.user_store.get_user(username)
         if not user:
             return None
         
-        return self.decrypt_api_key(user['api_key_encrypted'])
+        api_key = self.decrypt_api_key(user['api_key_encrypted'])
+        self.key_cache.set(username, api_key, user['api_key_version'])
+        return api_key
+    
+    def rotate_api_key(self, username, new_api_key):
+        """Replace a user's Groq API key"""
+        valid, msg = self.validate_api_key(new_api_key)
+        if not valid:
+            return {'success': False, 'error': msg}
+        
+        if not self.user_store.update_api_key(username, self.encrypt_api_key(new_api_key)):
+            return {'success': False, 'error': 'User not found'}
+        
+        self.key_cache.invalidate(username)
+        return {'success': True, 'message': 'API key updated!'}
     
     def mask_api_key(self, api_key):
         """Mask API key for display (sk-****...****)"""
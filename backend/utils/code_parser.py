@@ -0,0 +1,105 @@
+"""Single-pass, incremental parser for ``` fenced code blocks in LLM responses"""
+from collections import namedtuple
+
+FENCE = '```'
+
+# language: lowercased info-string tag ('' if untagged); start/end: offsets of the
+# code in the full text; closed: False if the response ended inside the block
+CodeBlock = namedtuple('CodeBlock', 'language code start end closed')
+
+
+class FencedCodeParser:
+    def __init__(self):
+        """feed() text as it arrives (whole responses or streamed chunks), then close()"""
+        self.blocks = []
+        self._buf = ''
+        self._pos = 0  # Offset of _buf[0] in the full text
+        self._language = None  # Set while inside a block
+        self._code = []
+        self._code_start = 0
+
+    @property
+    def in_block(self):
+        return self._language is not None
+
+    def partial(self):
+        """(language, code so far) of the block being streamed, or None"""
+        if not self.in_block:
+            return None
+        return self._language, ''.join(self._code) + self._buf
+
+    def feed(self, chunk):
+        """Consume a chunk; returns the blocks it completed"""
+        buf = self._buf + chunk if self._buf else chunk
+        completed = []
+        cursor = 0  # Everything before cursor has been consumed
+        while True:
+            i = buf.find(FENCE, cursor)
+            if i == -1:
+                # Keep a tail in case a fence is split across chunks
+                keep_from = max(len(buf) - (len(FENCE) - 1), cursor)
+                if self.in_block:
+                    self._code.append(buf[cursor:keep_from])
+                cursor = keep_from
+                break
+
+            if self.in_block:
+                self._code.append(buf[cursor:i])
+                completed.append(self._finish(self._pos + i))
+                cursor = i + len(FENCE)
+                continue
+
+            # Opening fence: wait until its info-string line is complete
+            newline = buf.find('\n', i + len(FENCE))
+            if newline == -1:
+                cursor = i
+                break
+
+            info = buf[i + len(FENCE):newline]
+            inline_close = info.find(FENCE)
+            if inline_close != -1:
+                # ```<code>``` on a single line
+                start = self._pos + i + len(FENCE)
+                completed.append(CodeBlock('', info[:inline_close], start, start + inline_close, True))
+                cursor = i + len(FENCE) * 2 + inline_close
+                continue
+
+            tag = info.strip().split(None, 1)
+            self._language = tag[0].lower() if tag else ''
+            cursor = newline + 1
+            self._code_start = self._pos + cursor
+
+        self._buf = buf[cursor:]
+        self._pos += cursor
+        self.blocks.extend(completed)
+        return completed
+
+    def close(self):
+        """End of input; an unterminated block is returned with closed=False"""
+        completed = []
+        if self.in_block:
+            self._code.append(self._buf)
+            completed.append(self._finish(self._pos + len(self._buf), closed=False))
+        self._pos += len(self._buf)
+        self._buf = ''
+        self.blocks.extend(completed)
+        return completed
+
+    def _finish(self, end, closed=True):
+        block = CodeBlock(self._language, ''.join(self._code), self._code_start, end, closed)
+        self._language = None
+        self._code = []
+        return block
+
+
+def parse_code_blocks(text):
+    """Every fenced block in a complete response, in order"""
+    parser = FencedCodeParser()
+    parser.feed(text)
+    parser.close()
+    return parser.blocks
+
+
+def has_unclosed_block(text):
+    """True if the response ends inside a fenced block (e.g. it was cut off at max_tokens)"""
+    return any(not block.closed for block in parse_code_blocks(text))
@@ -0,0 +1,78 @@
+"""Cooperative (gevent-aware) concurrency helpers for the request path"""
+import os
+import threading
+
+
+def gevent_active():
+    """True when running under a gevent worker that monkey-patched threading"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def spawn(fn, *args, **kwargs):
+    """Run fn in the background: a greenlet under gevent, a daemon thread otherwise"""
+    if gevent_active():
+        import gevent
+        return gevent.spawn(fn, *args, **kwargs)
+    worker = threading.Thread(target=fn, args=args, kwargs=kwargs, daemon=True)
+    worker.start()
+    return worker
+
+
+def offload(fn, *args, **kwargs):
+    """Run a blocking C-level call (Chroma) without stalling the gevent hub; CPU work uses utils.cpu_pool"""
+    if gevent_active():
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args, kwargs)
+    return fn(*args, **kwargs)
+
+
+class ServerBusyError(Exception):
+    """Raised when a request waited too long for a concurrency slot"""
+
+
+class ConcurrencyLimiter:
+    def __init__(self, limit=None, queue_timeout=None):
+        """Caps in-flight chat turns per worker; extra requests wait up to queue_timeout seconds"""
+        self.limit = limit or int(os.getenv('CHAT_MAX_CONCURRENCY', 1000))
+        self.queue_timeout = queue_timeout or float(os.getenv('CHAT_QUEUE_TIMEOUT', 30))
+        self._slots = threading.BoundedSemaphore(self.limit)
+        self._lock = threading.Lock()
+        self.stats = {'inflight': 0, 'waiting': 0, 'peak_inflight': 0, 'completed': 0, 'rejected': 0}
+
+    def acquire(self):
+        with self._lock:
+            self.stats['waiting'] += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.stats['waiting'] -= 1
+            if not acquired:
+                self.stats['rejected'] += 1
+                raise ServerBusyError(f"All {self.limit} chat slots busy for {self.queue_timeout:g}s")
+            self.stats['inflight'] += 1
+            self.stats['peak_inflight'] = max(self.stats['peak_inflight'], self.stats['inflight'])
+
+    def release(self):
+        with self._lock:
+            self.stats['inflight'] -= 1
+            self.stats['completed'] += 1
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['limit'] = self.limit
+        stats['queue_timeout'] = self.queue_timeout
+        stats['mode'] = 'gevent' if gevent_active() else 'threads'
+        return stats
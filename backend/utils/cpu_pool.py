@@ -0,0 +1,68 @@
+"""Dedicated thread pool for CPU-bound calls so they never stall the gevent event loop"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .concurrency import gevent_active
+
+
+class CPUPool:
+    def __init__(self, max_workers=None):
+        """Bounded pool, separate from the hub threadpool Chroma uses, with queue-depth metrics"""
+        self.max_workers = max_workers or int(os.getenv('CPU_POOL_WORKERS', os.cpu_count() or 2))
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'in_flight': 0,
+                      'max_in_flight': 0, 'total_time': 0.0}
+
+    def _get_pool(self):
+        # Created per process so every gunicorn worker gets its own after fork.
+        # Under gevent the executor's threads would be greenlets, so use gevent's
+        # native-thread pool there
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                if gevent_active():
+                    from gevent.threadpool import ThreadPool
+                    self._pool = ThreadPool(self.max_workers)
+                else:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='aidevs-cpu')
+                self._pid = os.getpid()
+            return self._pool
+
+    def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and wait (cooperatively under gevent) for its result"""
+        pool = self._get_pool()
+        start = time.perf_counter()
+        with self._lock:
+            self.stats['submitted'] += 1
+            self.stats['in_flight'] += 1
+            self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+        outcome = 'failed'
+        try:
+            if isinstance(pool, ThreadPoolExecutor):
+                result = pool.submit(fn, *args, **kwargs).result()
+            else:
+                result = pool.apply(fn, args, kwargs)
+            outcome = 'completed'
+            return result
+        finally:
+            with self._lock:
+                self.stats['in_flight'] -= 1
+                self.stats[outcome] += 1
+                self.stats['total_time'] += time.perf_counter() - start
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        finished = stats['completed'] + stats['failed']
+        stats['queue_depth'] = max(0, stats['in_flight'] - self.max_workers)
+        stats['avg_time_ms'] = round(stats.pop('total_time') / finished * 1000, 2) if finished else 0.0
+        stats['workers'] = self.max_workers
+        return stats
+
+
+# Shared by auth, download packaging and frontend tests in this process
+cpu_pool = CPUPool()
@@ -0,0 +1,26 @@
+"""CPU-bound tasks run on utils.cpu_pool (bcrypt and zlib release the GIL while they work)"""
+import os
+import threading
+import zipfile
+import bcrypt
+
+
+def hash_password(password):
+    """bcrypt hash of a password"""
+    salt = bcrypt.gensalt()
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def check_password(password, hashed_password):
+    """bcrypt verification of a password against its hash"""
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+
+def write_zip(zip_path, entries):
+    """Deflate (name, text) entries into a zip file written atomically"""
+    tmp_path = f"{zip_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in entries:
+            zip_file.writestr(name, content)
+    os.replace(tmp_path, zip_path)
+    return os.path.getsize(zip_path)
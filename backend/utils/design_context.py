@@ -0,0 +1,219 @@
+"""Distil earlier website sections into a compact design-context block for prompts"""
+import re
+import threading
+from collections import Counter
+from functools import lru_cache
+from html.parser import HTMLParser
+
+CUSTOM_PROPERTY_RE = re.compile(r'(--[\w-]+)\s*:\s*([^;}]+)')
+COLOR_RE = re.compile(r'#[0-9a-fA-F]{3,8}\b|(?:rgba?|hsla?)\([^)]*\)')
+FONT_RE = re.compile(r'font-family\s*:\s*([^;}]+)')
+BREAKPOINT_RE = re.compile(r'@media[^{]*?(?:max|min)-width\s*:\s*(\d+px)')
+RADIUS_RE = re.compile(r'border-radius\s*:\s*([^;}]+)')
+
+MAX_ITEMS = 8
+
+
+class _SectionScanner(HTMLParser):
+    """Collects styles, class names, ids, nav links and font imports from one section"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.css = []
+        self.classes = Counter()
+        self.ids = []
+        self.links = []
+        self.font_imports = []
+        self._in_style = False
+        self._nav_depth = 0
+        self._link_href = None
+        self._link_text = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        for name in (attrs.get('class') or '').split():
+            self.classes[name] += 1
+        if attrs.get('id'):
+            self.ids.append(attrs['id'])
+        if attrs.get('style'):
+            self.css.append(attrs['style'])
+
+        if tag == 'style':
+            self._in_style = True
+        elif tag in ('nav', 'header'):
+            self._nav_depth += 1
+        elif tag == 'a' and self._nav_depth and attrs.get('href'):
+            self._link_href = attrs['href']
+            self._link_text = []
+        elif tag == 'link' and 'fonts.googleapis.com' in (attrs.get('href') or ''):
+            self.font_imports.append(attrs['href'])
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self._in_style = False
+        elif tag in ('nav', 'header') and self._nav_depth:
+            self._nav_depth -= 1
+        elif tag == 'a' and self._link_href is not None:
+            text = ' '.join(''.join(self._link_text).split())
+            self.links.append((text or self._link_href, self._link_href))
+            self._link_href = None
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.css.append(data)
+            # @import url(https://fonts.googleapis.com/...) inside <style>
+            self.font_imports.extend(re.findall(r'fonts\.googleapis\.com/css2?\?family=([\w+:@;,.]+)', data))
+        elif self._link_href is not None:
+            self._link_text.append(data)
+
+
+def _unique(items, limit=MAX_ITEMS):
+    seen = []
+    for item in items:
+        item = item.strip()
+        if item and item not in seen:
+            seen.append(item)
+        if len(seen) >= limit:
+            break
+    return seen
+
+
+def _unique_links(links):
+    seen = {}
+    for text, href in links:
+        seen.setdefault(href, text)
+    return [(text, href) for href, text in list(seen.items())[:MAX_ITEMS]]
+
+
+@lru_cache(maxsize=256)
+def extract_design(html):
+    """Design tokens of one section (memoized; sections don't change once stored)"""
+    scanner = _SectionScanner()
+    try:
+        scanner.feed(html)
+        scanner.close()
+    except Exception as e:
+        print(f"Design context parse error: {e}")
+    css = '\n'.join(scanner.css)
+
+    return {
+        'custom_properties': dict(CUSTOM_PROPERTY_RE.findall(css)),
+        'colors': Counter(color.replace(' ', '').lower() for color in COLOR_RE.findall(css)),
+        'fonts': _unique(FONT_RE.findall(css)),
+        'breakpoints': _unique(BREAKPOINT_RE.findall(css)),
+        'radii': Counter(radius.strip() for radius in RADIUS_RE.findall(css)),
+        'classes': scanner.classes,
+        'ids': scanner.ids,
+        'nav_links': scanner.links,
+        'font_imports': _unique(scanner.font_imports, 4)
+    }
+
+
+def _class_convention(classes):
+    names = list(classes)
+    if not names:
+        return None
+    if any('__' in name for name in names):
+        style = 'BEM (block__element--modifier)'
+    elif sum('-' in name for name in names) >= len(names) / 2:
+        style = 'kebab-case'
+    elif any(re.search(r'[a-z][A-Z]', name) for name in names):
+        style = 'camelCase'
+    else:
+        style = 'single words'
+    examples = ', '.join(name for name, _ in classes.most_common(MAX_ITEMS))
+    return f"{style}, e.g. {examples}"
+
+
+def build_design_context(sections):
+    """Compact summary of earlier sections' look and structure, '' if there are none"""
+    sections = {name: html for name, html in (sections or {}).items() if html}
+    if not sections:
+        return ""
+
+    custom_properties = {}
+    colors, radii, classes = Counter(), Counter(), Counter()
+    fonts, breakpoints, ids, nav_links, font_imports = [], [], [], [], []
+    for html in sections.values():
+        design = extract_design(html)
+        for name, value in design['custom_properties'].items():
+            custom_properties.setdefault(name, value.strip())
+        colors.update(design['colors'])
+        radii.update(design['radii'])
+        classes.update(design['classes'])
+        fonts += design['fonts']
+        breakpoints += design['breakpoints']
+        ids += design['ids']
+        nav_links += design['nav_links']
+        font_imports += design['font_imports']
+
+    lines = [f"DESIGN CONTEXT (keep consistent with the existing {', '.join(sections)} sections):"]
+    if custom_properties:
+        props = list(custom_properties.items())[:MAX_ITEMS * 2]
+        lines.append("- CSS variables: " + '; '.join(f"{name}: {value}" for name, value in props))
+    if colors:
+        lines.append("- Palette: " + ', '.join(color for color, _ in colors.most_common(MAX_ITEMS)))
+    if fonts:
+        lines.append("- Fonts: " + ' | '.join(_unique(fonts)))
+    if font_imports:
+        lines.append("- Font imports: " + ', '.join(_unique(font_imports, 4)))
+    convention = _class_convention(classes)
+    if convention:
+        lines.append(f"- Class naming: {convention}")
+    if radii:
+        lines.append("- Border radius: " + ', '.join(radius for radius, _ in radii.most_common(3)))
+    if breakpoints:
+        lines.append("- Breakpoints: " + ', '.join(_unique(breakpoints)))
+    if nav_links:
+        lines.append("- Nav links: " + ', '.join(f"{text} ({href})" for text, href in _unique_links(nav_links)))
+    if ids:
+        lines.append("- Element ids in use: " + ', '.join(_unique(ids, MAX_ITEMS * 2)))
+    return '\n'.join(lines)
+
+
+class TokenCounter:
+    def __init__(self):
+        """Prompt token estimates: tiktoken when it is available, ~4 chars/token otherwise"""
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.stats = {'prompts': 0, 'raw_tokens': 0, 'context_tokens': 0}
+
+    def _get_encoding(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                try:
+                    import tiktoken
+                    # Llama's tokenizer differs; cl100k is a close enough estimate
+                    self._encoding = tiktoken.get_encoding('cl100k_base')
+                except Exception as e:
+                    print(f"⚠️ tiktoken unavailable ({e}), estimating tokens from length")
+        return self._encoding
+
+    def count(self, text):
+        encoding = self._get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+    def record(self, raw_text, context_text):
+        """Count both versions of the context; returns (raw_tokens, context_tokens)"""
+        raw_tokens, context_tokens = self.count(raw_text), self.count(context_text)
+        with self._lock:
+            self.stats['prompts'] += 1
+            self.stats['raw_tokens'] += raw_tokens
+            self.stats['context_tokens'] += context_tokens
+        return raw_tokens, context_tokens
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['tokens_saved'] = stats['raw_tokens'] - stats['context_tokens']
+        stats['savings'] = round(stats['tokens_saved'] / stats['raw_tokens'], 3) if stats['raw_tokens'] else 0.0
+        stats['encoding'] = 'cl100k_base' if self._encoding is not None else 'chars/4'
+        return stats
+
+
+# Shared by every FrontendAgent in this process
+token_counter = TokenCounter()
@@ -0,0 +1,99 @@
+"""Pool of reusable Groq clients keyed by API key"""
+import atexit
+import os
+import threading
+from collections import OrderedDict
+
+import httpx
+from groq import Groq
+
+from .key_pool import mask_key
+from .rate_limiter import rate_limiter
+
+
+class GroqClientPool:
+    def __init__(self, max_clients=None, keepalive_connections=None, keepalive_expiry=None, timeout=None):
+        """Keep one keep-alive Groq client per API key, evicting the least recently used"""
+        self.max_clients = max_clients or int(os.getenv('GROQ_POOL_MAX_CLIENTS', 32))
+        self.keepalive_connections = keepalive_connections or int(os.getenv('GROQ_POOL_KEEPALIVE', 10))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv('GROQ_POOL_KEEPALIVE_EXPIRY', 120))
+        self.timeout = timeout or float(os.getenv('GROQ_TIMEOUT', 60))
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        # Close keep-alive connections cleanly when the worker exits
+        atexit.register(self.close_all)
+
+    def _build_client(self, api_key):
+        """Create a Groq client backed by a persistent HTTP connection pool"""
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_keepalive_connections=self.keepalive_connections,
+                max_connections=self.keepalive_connections * 2,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            timeout=self.timeout,
+            # Every response (streamed ones as soon as headers arrive) refills the key's buckets
+            event_hooks={'response': [
+                lambda response: rate_limiter.observe(api_key, response.status_code, response.headers)
+            ]}
+        )
+        # Retries are ours (jittered, under a deadline), so the SDK shouldn't add its own
+        return Groq(api_key=api_key, http_client=http_client, max_retries=0)
+
+    def get(self, api_key):
+        """Return the pooled client for an API key, creating it if needed"""
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is not None:
+                self._clients.move_to_end(api_key)
+                self.stats['hits'] += 1
+                return client
+
+            self.stats['misses'] += 1
+            client = self._build_client(api_key)
+            self._clients[api_key] = client
+
+            # Forget clients beyond the bound (least recently used first). They are
+            # not closed: another greenlet may still be mid-request on one, and its
+            # connections are released once the last reference goes away
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+                self.stats['evictions'] += 1
+
+            return client
+
+    def prewarm(self, api_key):
+        """Open the TLS connection for an API key ahead of the first request"""
+        if not api_key:
+            return
+
+        def _connect():
+            try:
+                self.get(api_key).models.list()
+                print(f"✅ Groq connection pre-warmed for key {mask_key(api_key)}")
+            except Exception as e:
+                print(f"⚠️ Groq pre-warm failed: {e}")
+
+        threading.Thread(target=_connect, daemon=True).start()
+
+    def close_all(self):
+        """Close every pooled client"""
+        with self._lock:
+            while self._clients:
+                _, client = self._clients.popitem(last=False)
+                self._close(client)
+
+    def _close(self, client):
+        try:
+            client.close()
+        except Exception as e:
+            print(f"⚠️ Error closing Groq client: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, size=len(self._clients), max_clients=self.max_clients)
+
+
+# Shared by every agent in this process
+client_pool = GroqClientPool()
@@ -0,0 +1,342 @@
+"""Static quality checks for generated HTML (accessibility, responsiveness, structure, scripts)"""
+import re
+from collections import Counter
+from html.parser import HTMLParser
+
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+}
+# Browsers close these implicitly, so a missing end tag is not an error
+OPTIONAL_END = {'p', 'li', 'dt', 'dd', 'option', 'tr', 'td', 'th', 'thead', 'tbody', 'tfoot', 'html', 'head', 'body'}
+LANDMARKS = {
+    'header': 'banner', 'nav': 'navigation', 'main': 'main', 'footer': 'contentinfo'
+}
+UNLABELLED_INPUT_TYPES = {'hidden', 'submit', 'button', 'reset', 'image'}
+ID_REFERENCE_RE = re.compile(r'''getElementById\(\s*['"]([\w-]+)['"]\s*\)|querySelector(?:All)?\(\s*['"]#([\w-]+)['"]\s*\)''')
+WIDE_FIXED_WIDTH_RE = re.compile(r'(?<![-\w])(?:min-)?width\s*:\s*(\d{4,})px')
+MAX_EXAMPLES = 5
+# A '/' after one of these starts a regex literal rather than a division
+REGEX_PRECEDERS = set('=(,:[!&|?{};+-*%<>~^')
+REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw', 'instanceof', 'yield', 'await'}
+TRAILING_WORD_RE = re.compile(r'([A-Za-z_$][\w$]*)\s*$')
+
+
+class _Scanner(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tags = Counter()
+        self.stack = []
+        self.unclosed = []
+        self.stray_end_tags = []
+        self.ids = Counter()
+        self.headings = []
+        self.landmarks = set()
+        self.images_without_alt = []
+        self.inputs = []  # (tag, id, labelled, display name)
+        self.label_for = set()
+        self.empty_links = []
+        self.empty_buttons = []
+        self.has_viewport = False
+        self.html_lang = None
+        self.styles = []
+        self.scripts = []
+        self._label_depth = 0
+        self._text_target = None  # ['a'|'button', attrs, text parts]
+        self._in_style = False
+        self._in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        self.tags[tag] += 1
+        if tag not in VOID_ELEMENTS:
+            self.stack.append((tag, self.getpos()[0]))
+
+        if attrs.get('id'):
+            self.ids[attrs['id']] += 1
+        if attrs.get('style'):
+            self.styles.append(attrs['style'])
+        role = attrs.get('role')
+        if tag in LANDMARKS:
+            self.landmarks.add(LANDMARKS[tag])
+        if role in LANDMARKS.values():
+            self.landmarks.add(role)
+
+        if re.fullmatch(r'h[1-6]', tag):
+            self.headings.append(int(tag[1]))
+        elif tag == 'img':
+            if 'alt' not in attrs and role != 'presentation':
+                self.images_without_alt.append((attrs.get('src') or '<img>')[:60])
+            elif self._text_target is not None:
+                # An image link is named by its alt text
+                self._text_target[2].append(attrs.get('alt') or '')
+        elif tag == 'label':
+            self._label_depth += 1
+            if attrs.get('for'):
+                self.label_for.add(attrs['for'])
+        elif tag in ('input', 'select', 'textarea'):
+            if tag != 'input' or (attrs.get('type') or 'text').lower() not in UNLABELLED_INPUT_TYPES:
+                labelled = bool(self._label_depth or attrs.get('aria-label') or attrs.get('aria-labelledby') or attrs.get('title'))
+                self.inputs.append((tag, attrs.get('id'), labelled, attrs.get('name') or attrs.get('placeholder') or tag))
+        elif tag in ('a', 'button'):
+            named = attrs.get('aria-label') or attrs.get('title')
+            self._text_target = None if named else [tag, attrs, []]
+        elif tag == 'meta' and (attrs.get('name') or '').lower() == 'viewport':
+            self.has_viewport = True
+        elif tag == 'html':
+            self.html_lang = attrs.get('lang', '')
+        elif tag == 'style':
+            self._in_style = True
+        elif tag == 'script' and not attrs.get('src'):
+            self._in_script = True
+            self.scripts.append([])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1][0] == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if tag == 'label' and self._label_depth:
+            self._label_depth -= 1
+        elif tag == 'style':
+            self._in_style = False
+        elif tag == 'script':
+            self._in_script = False
+        elif tag in ('a', 'button') and self._text_target and self._text_target[0] == tag:
+            kind, attrs, text = self._text_target
+            if not ''.join(text).strip():
+                target = self.empty_links if kind == 'a' else self.empty_buttons
+                target.append(attrs.get('href') or attrs.get('class') or kind)
+            self._text_target = None
+
+        open_tags = [name for name, _ in self.stack]
+        if tag not in open_tags:
+            self.stray_end_tags.append((tag, self.getpos()[0]))
+            return
+        # Everything opened after the matching tag was left unclosed
+        while self.stack:
+            name, line = self.stack.pop()
+            if name == tag:
+                break
+            if name not in OPTIONAL_END:
+                self.unclosed.append((name, line))
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.styles.append(data)
+        elif self._in_script:
+            self.scripts[-1].append(data)
+        if self._text_target is not None:
+            self._text_target[2].append(data)
+
+
+def _starts_regex(source, i, last):
+    """Whether the '/' at i opens a regex literal, judged by the token before it"""
+    if last is None or last in REGEX_PRECEDERS:
+        return True
+    word = TRAILING_WORD_RE.search(source, max(0, i - 16), i) if (last.isalnum() or last in '_$') else None
+    return bool(word) and word.group(1) in REGEX_KEYWORDS
+
+
+def _regex_end(source, i):
+    """Index just past the regex literal (and flags) opened at i, or None if unterminated"""
+    n = len(source)
+    end = i + 1
+    in_class = False
+    while end < n:
+        char = source[end]
+        if char == '\\':
+            end += 1
+        elif char == '\n':
+            return None
+        elif char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            end += 1
+            while end < n and source[end].isalpha():
+                end += 1
+            return end
+        end += 1
+    return None
+
+
+def _script_balance_errors(source):
+    """Unbalanced brackets or unterminated strings/comments/regexes in inline JavaScript"""
+    pairs = {')': '(', ']': '[', '}': '{'}
+    stack = []
+    last = None  # last significant character, to tell regex literals from division
+    i, n = 0, len(source)
+    while i < n:
+        char = source[i]
+        if char in '\'"`':
+            end = i + 1
+            while end < n and source[end] != char:
+                if source[end] == '\\':
+                    end += 1
+                elif source[end] == '\n' and char != '`':
+                    break
+                end += 1
+            if end >= n or source[end] != char:
+                return f"unterminated string starting with {char}"
+            i = end + 1
+            last = char
+            continue
+        if source.startswith('//', i):
+            newline = source.find('\n', i)
+            i = n if newline == -1 else newline + 1
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            if end == -1:
+                return "unterminated /* comment"
+            i = end + 2
+            continue
+        if char == '/' and _starts_regex(source, i, last):
+            end = _regex_end(source, i)
+            if end is None:
+                return "unterminated regular expression"
+            i = end
+            last = '/'
+            continue
+        if not char.isspace():
+            last = char
+        if char in '([{':
+            stack.append(char)
+        elif char in pairs:
+            if not stack or stack.pop() != pairs[char]:
+                return f"unexpected '{char}'"
+        i += 1
+    if stack:
+        return f"unclosed '{stack[-1]}'"
+    return None
+
+
+def _check(checks, check_id, category, failures, message, severity='fail', passed_message=None):
+    failures = list(failures)
+    checks.append({
+        'id': check_id,
+        'category': category,
+        'status': severity if failures else 'pass',
+        'message': message if failures else (passed_message or message),
+        'count': len(failures),
+        'examples': [str(example) for example in failures[:MAX_EXAMPLES]]
+    })
+
+
+def analyze_html(html):
+    """Structured, deterministic quality report for an HTML document or fragment"""
+    scanner = _Scanner()
+    scanner.feed(html)
+    scanner.close()
+    for name, line in scanner.stack:
+        if name not in OPTIONAL_END:
+            scanner.unclosed.append((name, line))
+
+    css = '\n'.join(scanner.styles)
+    scripts = ['\n'.join(parts) for parts in scanner.scripts]
+    is_document = scanner.tags['html'] > 0 or scanner.tags['body'] > 0
+    checks = []
+
+    # Accessibility
+    _check(checks, 'img-alt', 'accessibility', scanner.images_without_alt,
+           "Images without alt text", passed_message="All images have alt text")
+    unlabelled = [name for tag, element_id, labelled, name in scanner.inputs
+                  if not labelled and element_id not in scanner.label_for]
+    _check(checks, 'form-labels', 'accessibility', unlabelled,
+           "Form fields without a label or aria-label", passed_message="All form fields are labelled")
+    skipped = [f"h{prev} -> h{level}" for prev, level in zip(scanner.headings, scanner.headings[1:]) if level > prev + 1]
+    _check(checks, 'heading-order', 'accessibility', skipped,
+           "Heading levels are skipped", severity='warn', passed_message="Heading levels are sequential")
+    _check(checks, 'single-h1', 'accessibility',
+           [f"{scanner.tags['h1']} h1 elements"] if scanner.tags['h1'] > 1 else [],
+           "More than one h1", severity='warn', passed_message="At most one h1")
+    missing_landmarks = [role for role in ('banner', 'navigation', 'main', 'contentinfo') if role not in scanner.landmarks]
+    _check(checks, 'landmarks', 'accessibility', missing_landmarks,
+           "Missing landmark regions", severity='warn', passed_message="Header, nav, main and footer landmarks present")
+    _check(checks, 'link-names', 'accessibility', scanner.empty_links + scanner.empty_buttons,
+           "Links or buttons without an accessible name", passed_message="Links and buttons have accessible names")
+    if is_document:
+        _check(checks, 'html-lang', 'accessibility', [] if scanner.html_lang else ['<html>'],
+               "Document has no lang attribute", passed_message="Document declares its language")
+
+    # Responsiveness
+    media_queries = css.count('@media')
+    if is_document:
+        _check(checks, 'viewport-meta', 'responsiveness', [] if scanner.has_viewport else ['<head>'],
+               "No viewport meta tag", passed_message="Viewport meta tag present")
+    _check(checks, 'media-queries', 'responsiveness', [] if media_queries else ['no @media rules'],
+           "No media queries", severity='warn', passed_message=f"{media_queries} media queries")
+    _check(checks, 'fixed-widths', 'responsiveness', [f"{width}px" for width in WIDE_FIXED_WIDTH_RE.findall(css)],
+           "Fixed widths wider than a phone screen", severity='warn', passed_message="No oversized fixed widths")
+
+    # Structure
+    _check(checks, 'unclosed-tags', 'structure', [f"<{name}> (line {line})" for name, line in scanner.unclosed],
+           "Unclosed tags", passed_message="All tags are closed")
+    _check(checks, 'stray-end-tags', 'structure', [f"</{name}> (line {line})" for name, line in scanner.stray_end_tags],
+           "End tags without a matching start tag", passed_message="No stray end tags")
+    _check(checks, 'duplicate-ids', 'structure', [element_id for element_id, count in scanner.ids.items() if count > 1],
+           "Duplicate element ids", passed_message="Element ids are unique")
+
+    # Scripts
+    syntax_errors = []
+    missing_ids = set()
+    for index, source in enumerate(scripts, 1):
+        error = _script_balance_errors(source)
+        if error:
+            syntax_errors.append(f"script {index}: {error}")
+        for by_id, by_selector in ID_REFERENCE_RE.findall(source):
+            element_id = by_id or by_selector
+            if element_id not in scanner.ids:
+                missing_ids.add(element_id)
+    _check(checks, 'script-syntax', 'scripts', syntax_errors,
+           "Inline scripts with syntax errors", passed_message=f"{len(scripts)} inline scripts parse cleanly")
+    _check(checks, 'script-id-references', 'scripts', sorted(missing_ids),
+           "Scripts reference ids that don't exist", passed_message="Script id references resolve")
+
+    errors = sum(check['status'] == 'fail' for check in checks)
+    warnings = sum(check['status'] == 'warn' for check in checks)
+    return {
+        'summary': {
+            'passed': len(checks) - errors - warnings,
+            'warnings': warnings,
+            'errors': errors,
+            'score': round(100 * (len(checks) - errors - 0.5 * warnings) / len(checks))
+        },
+        'checks': checks,
+        'stats': {
+            'bytes': len(html.encode('utf-8')),
+            'elements': sum(scanner.tags.values()),
+            'images': scanner.tags['img'],
+            'links': scanner.tags['a'],
+            'forms': scanner.tags['form'],
+            'inline_scripts': len(scripts),
+            'media_queries': media_queries
+        }
+    }
+
+
+def format_report(report, narrative=''):
+    """Markdown rendering used for TEST_RESULTS.md"""
+    summary = report['summary']
+    lines = [
+        f"**Score: {summary['score']}/100** ({summary['passed']} passed, "
+        f"{summary['warnings']} warnings, {summary['errors']} errors)"
+    ]
+    icons = {'pass': '✅', 'warn': '⚠️', 'fail': '❌'}
+    category = None
+    for check in report['checks']:
+        if check['category'] != category:
+            category = check['category']
+            lines += ["", f"### {category.capitalize()}", ""]
+        line = f"- {icons[check['status']]} {check['message']}"
+        if check['examples']:
+            line += f" ({check['count']}): " + ', '.join(f"`{example}`" for example in check['examples'])
+        lines.append(line)
+    if narrative:
+        lines += ["", "### Summary", "", narrative.strip()]
+    return '\n'.join(lines)
@@ -0,0 +1,161 @@
+"""Background job queue with persisted job records (SQLite)"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from .sqlite_pool import SQLitePool
+
+
+class JobQueue:
+    def __init__(self, db_path=None, max_workers=None):
+        """Run jobs on a bounded worker pool and persist their status"""
+        self.db_path = db_path or os.getenv('JOBS_DB_PATH', './jobs.db')
+        self.max_workers = max_workers or int(os.getenv('JOB_MAX_WORKERS', 2))
+        # Unfinished jobs are leased: the owning process renews heartbeat_at, and a
+        # job whose lease lapses (process gone, container replaced) is failed.
+        # PIDs can't tell this apart once containers reuse them
+        self.boot_id = uuid.uuid4().hex
+        self.lease_seconds = float(os.getenv('JOB_LEASE_SECONDS', 60))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='aidevs-job')
+        self.pool_size = int(os.getenv('JOBS_DB_POOL_SIZE', 4))
+        self.db = SQLitePool(self.db_path, self.pool_size, row_factory=sqlite3.Row)
+
+        with self.db.connection() as conn:
+            self._create_tables(conn)
+        self._recover_interrupted()
+        
+        heartbeat = threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True)
+        heartbeat.start()
+
+    def _create_tables(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                session_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                owner TEXT,
+                heartbeat_at REAL,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT,
+                duration REAL,
+                result TEXT,
+                error TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_session ON jobs (session_id, created_at)")
+
+    def _recover_interrupted(self):
+        """Mark unfinished jobs whose lease lapsed as failed"""
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+                "WHERE status IN ('queued', 'running') AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                ("Interrupted by server restart", datetime.now().isoformat(), time.time() - self.lease_seconds)
+            )
+        if cursor.rowcount:
+            print(f"⚠️ Marked {cursor.rowcount} interrupted job(s) as failed")
+
+    def _heartbeat_loop(self):
+        """Renew this process's leases and reap jobs whose owner stopped renewing"""
+        while True:
+            time.sleep(self.lease_seconds / 4)
+            try:
+                with self.db.connection() as conn:
+                    conn.execute(
+                        "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                        (time.time(), self.boot_id)
+                    )
+                self._recover_interrupted()
+            except sqlite3.Error as e:
+                print(f"⚠️ Job heartbeat error: {e}")
+
+    def submit(self, session_id, kind, fn, on_finish=None):
+        """Queue fn() as a job; returns the job id immediately
+
+        on_finish(job), if given, runs once the job's final status is recorded.
+        """
+        job_id = uuid.uuid4().hex
+        with self.db.connection() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, session_id, kind, status, owner, heartbeat_at, created_at) VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, session_id, kind, self.boot_id, time.time(), datetime.now().isoformat())
+            )
+        self.executor.submit(self._run, job_id, fn, on_finish)
+        print(f"📥 Queued {kind} job {job_id[:8]} for {session_id}")
+        return job_id
+
+    def _run(self, job_id, fn, on_finish=None):
+        with self.db.connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), job_id)
+            )
+
+        start = time.perf_counter()
+        status, result, error = 'done', None, None
+        try:
+            result = fn()
+        except Exception as e:
+            import traceback
+            print(f"❌ Job {job_id[:8]} failed:")
+            print(traceback.format_exc())
+            status, error = 'failed', str(e)
+
+        duration = round(time.perf_counter() - start, 3)
+        with self.db.connection() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, duration = ?, result = ?, error = ? WHERE id = ?",
+                (status, datetime.now().isoformat(), duration, json.dumps(result, default=str), error, job_id)
+            )
+        icon = "✅" if status == 'done' else "❌"
+        print(f"{icon} Job {job_id[:8]} {status} in {duration:.1f}s")
+
+        if on_finish:
+            try:
+                on_finish(self.get(job_id))
+            except Exception as e:
+                print(f"⚠️ Job {job_id[:8]} on_finish error: {e}")
+
+    def _to_dict(self, row):
+        job = dict(row)
+        for column in ('owner', 'heartbeat_at'):
+            job.pop(column, None)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def get(self, job_id):
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def latest(self, session_id, kind):
+        """Most recent job of a kind for a session"""
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE session_id = ? AND kind = ? ORDER BY created_at DESC LIMIT 1",
+                (session_id, kind)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_for_session(self, session_id, limit=10):
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE session_id = ? ORDER BY created_at DESC LIMIT ?",
+                (session_id, limit)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def clear_session(self, session_id):
+        """Forget finished jobs for a session (running jobs keep their records)"""
+        with self.db.connection() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE session_id = ? AND status IN ('done', 'failed')",
+                (session_id,)
+            )
@@ -0,0 +1,81 @@
+"""TTL cache for decrypted per-user API keys"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class APIKeyCache:
+    def __init__(self, ttl=None, max_entries=None, secure=None):
+        """Bounded LRU of username -> (key version, decrypted key), each entry expiring after ttl seconds"""
+        self.ttl = ttl or float(os.getenv('API_KEY_CACHE_TTL', 300))
+        self.max_entries = max_entries or int(os.getenv('API_KEY_CACHE_MAX_ENTRIES', 1024))
+        if secure is None:
+            secure = os.getenv('API_KEY_CACHE_SECURE', 'true').lower() == 'true'
+        # Secure mode keeps keys in mutable buffers that are zeroed when dropped
+        self.secure = secure
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stale': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, username, version=None):
+        """Return the cached key, or None on a miss or if it was cached for another key version"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            expires_at, cached_version, value = entry
+            if expires_at <= now:
+                self._drop(username)
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            if version is not None and cached_version != version:
+                # Rotated through another worker since this one cached it
+                self._drop(username)
+                self.stats['stale'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(username)
+            self.stats['hits'] += 1
+            return value.decode('utf-8') if self.secure else value
+
+    def set(self, username, api_key, version=None):
+        value = bytearray(api_key.encode('utf-8')) if self.secure else api_key
+        with self._lock:
+            if username in self._entries:
+                self._drop(username)
+            self._entries[username] = (time.monotonic() + self.ttl, version, value)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, username):
+        """Forget a user's key (re-registration, key rotation)"""
+        with self._lock:
+            if username in self._entries:
+                self._drop(username)
+                self.stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            for username in list(self._entries):
+                self._drop(username)
+
+    def _drop(self, username):
+        value = self._entries.pop(username)[-1]
+        if isinstance(value, bytearray):
+            value[:] = bytes(len(value))
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._entries))
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,153 @@
+"""Pool of server-side Groq API keys for users without a personal key"""
+import os
+import random
+import threading
+import time
+
+from .rate_limiter import rate_limiter, LLMError, RateLimitedError
+
+
+def mask_key(api_key):
+    """Loggable form of a key: prefix and last four characters"""
+    return f"{api_key[:8]}…{api_key[-4:]}" if len(api_key) > 12 else '…'
+
+
+class _PooledKey:
+    def __init__(self, api_key, weight):
+        self.api_key = api_key
+        self.weight = weight
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+        self.stats = {'requests': 0, 'successes': 0, 'throttled': 0, 'failures': 0, 'quarantines': 0}
+
+
+class ApiKeyPool:
+    def __init__(self, keys=None, strategy=None):
+        """Keys from GROQ_API_KEYS ('key' or 'key:weight', comma-separated), else GROQ_API_KEY"""
+        self.strategy = strategy or os.getenv('KEY_POOL_STRATEGY', 'least_loaded')
+        self.quarantine_seconds = float(os.getenv('KEY_POOL_QUARANTINE', 30))
+        self.invalid_quarantine_seconds = float(os.getenv('KEY_POOL_INVALID_QUARANTINE', 3600))
+        self.max_failures = int(os.getenv('KEY_POOL_MAX_FAILURES', 3))
+        self._lock = threading.Lock()
+        self._keys = {}
+        self.load(keys)
+
+    def load(self, keys=None):
+        """(Re)load the pool; call after load_dotenv() so .env keys are seen"""
+        if keys is None:
+            configured = os.getenv('GROQ_API_KEYS') or os.getenv('GROQ_API_KEY') or ''
+            keys = [entry.strip() for entry in configured.split(',') if entry.strip()]
+        pooled = {}
+        for entry in keys:
+            api_key, _, weight = entry.partition(':')
+            try:
+                pooled[api_key] = float(weight) if weight else 1.0
+            except ValueError:
+                print(f"⚠️ Ignoring bad weight '{weight}' for key {mask_key(api_key)}")
+                pooled[api_key] = 1.0
+        with self._lock:
+            # Keep the health and counters of keys that stay in the pool
+            self._keys = {api_key: self._keys.get(api_key) or _PooledKey(api_key, weight)
+                          for api_key, weight in pooled.items()}
+            for api_key, weight in pooled.items():
+                self._keys[api_key].weight = weight
+
+    @property
+    def keys(self):
+        return list(self._keys)
+
+    def acquire(self, deadline):
+        """Lease the best available key; RateLimitedError if every key stays unusable past deadline"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                ready, waits = [], []
+                for pooled in self._keys.values():
+                    blocked = max(pooled.quarantined_until - now, rate_limiter.retry_after(pooled.api_key))
+                    if blocked > 0:
+                        waits.append(blocked)
+                    else:
+                        ready.append(pooled)
+                if ready:
+                    pooled = self._choose(ready)
+                    pooled.in_flight += 1
+                    pooled.stats['requests'] += 1
+                    return pooled.api_key
+            if not waits:
+                raise LLMError("No server API keys are configured")
+            wait = min(waits)
+            if now + wait > deadline:
+                raise RateLimitedError(
+                    "All server API keys are rate limited, try again shortly",
+                    retry_after=wait
+                )
+            time.sleep(min(wait, 1.0))
+
+    def _choose(self, ready):
+        """Caller holds the lock"""
+        if self.strategy == 'weighted':
+            return random.choices(ready, weights=[pooled.weight for pooled in ready])[0]
+        # least_loaded: fewest requests in flight per unit of weight, then most token quota left
+        return min(ready, key=lambda pooled: (
+            pooled.in_flight / pooled.weight,
+            -self._tokens_available(pooled.api_key)
+        ))
+
+    def _tokens_available(self, api_key):
+        stats = rate_limiter.key_stats(api_key)
+        return stats['tokens_available'] if stats else rate_limiter.tpm
+
+    def release(self, api_key, outcome=None, retry_after=None):
+        """End a lease. outcome: 'ok', 'throttled' (429), 'invalid' (401/403), 'failed' or None (not sent)"""
+        with self._lock:
+            pooled = self._keys.get(api_key)
+            if pooled is None:
+                return
+            pooled.in_flight -= 1
+            if outcome == 'ok':
+                pooled.stats['successes'] += 1
+                pooled.consecutive_failures = 0
+            elif outcome == 'throttled':
+                pooled.stats['throttled'] += 1
+                self._quarantine(pooled, retry_after or self.quarantine_seconds)
+            elif outcome == 'invalid':
+                pooled.stats['failures'] += 1
+                self._quarantine(pooled, self.invalid_quarantine_seconds)
+            elif outcome == 'failed':
+                pooled.stats['failures'] += 1
+                pooled.consecutive_failures += 1
+                if pooled.consecutive_failures >= self.max_failures:
+                    pooled.consecutive_failures = 0
+                    self._quarantine(pooled, self.quarantine_seconds)
+
+    def _quarantine(self, pooled, seconds):
+        """Caller holds the lock"""
+        pooled.quarantined_until = max(pooled.quarantined_until, time.monotonic() + seconds)
+        pooled.stats['quarantines'] += 1
+        print(f"🚫 Server key {mask_key(pooled.api_key)} quarantined for {seconds:.0f}s")
+
+    def get_stats(self, per_key=False):
+        now = time.monotonic()
+        with self._lock:
+            keys = [(pooled.api_key, pooled.weight, pooled.in_flight, dict(pooled.stats),
+                     max(0.0, pooled.quarantined_until - now)) for pooled in self._keys.values()]
+        stats = {
+            'strategy': self.strategy,
+            'keys': len(keys),
+            'quarantined': sum(1 for key in keys if key[4] > 0),
+            'in_flight': sum(key[2] for key in keys)
+        }
+        for name in ('requests', 'successes', 'throttled', 'failures'):
+            stats[name] = sum(key[3][name] for key in keys)
+        if per_key:
+            stats['pool'] = [
+                dict(counters, key=mask_key(api_key), weight=weight, in_flight=in_flight,
+                     quarantined_for=round(quarantined_for, 1), limiter=rate_limiter.key_stats(api_key))
+                for api_key, weight, in_flight, counters, quarantined_for in keys
+            ]
+        return stats
+
+
+# Shared by every agent in this process
+key_pool = ApiKeyPool()
@@ -0,0 +1,159 @@
+"""Content-addressed LLM response cache with in-memory and on-disk tiers"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class LLMResponseCache:
+    def __init__(self, cache_dir=None, ttl=None, memory_entries=None, disk_max_bytes=None, enabled=None):
+        """LRU memory tier in front of a disk tier shared by every worker process"""
+        self.cache_dir = cache_dir or os.getenv('LLM_CACHE_DIR', './llm_cache')
+        self.ttl = ttl or int(os.getenv('LLM_CACHE_TTL', 24 * 3600))
+        self.memory_entries = memory_entries or int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', 256))
+        self.disk_max_bytes = disk_max_bytes or int(os.getenv('LLM_CACHE_DISK_MAX_MB', 200)) * 1024 * 1024
+        if enabled is None:
+            enabled = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+        self.enabled = enabled
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'memory_evictions': 0, 'disk_evictions': 0}
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(**request):
+        """Hash of the full completion request (model, params, messages)"""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key):
+        """Return the cached response text, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+            self._remember(key, value, now)
+        return value
+
+    def set(self, key, value):
+        """Store a response in both tiers"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self.stats['stores'] += 1
+            self._writes_since_sweep += 1
+            sweep = self._writes_since_sweep >= 50
+            if sweep:
+                self._writes_since_sweep = 0
+
+        self._write_disk(key, value, now)
+        if sweep:
+            self.sweep_disk()
+
+    def _remember(self, key, value, now):
+        self._memory[key] = (now + self.ttl, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats['memory_evictions'] += 1
+
+    def _read_disk(self, key, now):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('created', 0) + self.ttl <= now:
+            self._remove(path)
+            return None
+
+        # Touch so disk eviction approximates LRU
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry.get('value')
+
+    def _write_disk(self, key, value, now):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'created': now, 'value': value}, f)
+            # Atomic rename so other workers never read a partial file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ LLM cache write failed: {e}")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def sweep_disk(self):
+        """Drop entries unused for a full TTL, then the least recently used until under the size budget"""
+        now = time.time()
+        files = []
+        total = 0
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_mtime + self.ttl <= now:
+                    self._remove(path)
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        files.sort()
+        evicted = 0
+        while total > self.disk_max_bytes and files:
+            _, size, path = files.pop(0)
+            self._remove(path)
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self.stats['disk_evictions'] += evicted
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_size'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['memory_hits'] + stats['disk_hits']) / lookups, 3) if lookups else 0.0
+        stats['enabled'] = self.enabled
+        return stats
+
+
+# Shared by every agent in this process
+llm_cache = LLMResponseCache()
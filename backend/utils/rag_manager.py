@@ -1,16 +1,43 @@
 """RAG Manager using ChromaDB for context storage and retrieval"""
 import chromadb
 from chromadb.config import Settings
+import atexit
 import json
+import os
+import threading
+import time
 from datetime import datetime
+from .concurrency import offload
 
 class RAGManager:
-    def __init__(self, persist_directory="./chroma_db"):
+    def __init__(self, persist_directory=None, mode=None):
         """Initialize ChromaDB for RAG storage"""
-        self.client = chromadb.Client(Settings(
-            persist_directory=persist_directory,
-            anonymized_telemetry=False
-        ))
+        # persistent: on-disk store, one process only; server: one Chroma server
+        # shared by every worker (default when WEB_CONCURRENCY > 1); memory: ephemeral
+        workers = int(os.getenv('WEB_CONCURRENCY', 1))
+        self.mode = mode or os.getenv('CHROMA_MODE') or ('server' if workers > 1 else 'persistent')
+        if self.mode == 'persistent' and workers > 1:
+            # Chroma's PersistentClient is single-process; several workers on one
+            # directory corrupt the index
+            raise RuntimeError(
+                f"CHROMA_MODE=persistent does not support {workers} workers; "
+                "use CHROMA_MODE=server or WEB_CONCURRENCY=1"
+            )
+        self.persist_directory = persist_directory or os.getenv('CHROMA_PERSIST_DIRECTORY', './chroma_db')
+        settings = Settings(anonymized_telemetry=False)
+        start = time.perf_counter()
+        
+        if self.mode == 'server':
+            self.client = chromadb.HttpClient(
+                host=os.getenv('CHROMA_HOST', 'localhost'),
+                port=int(os.getenv('CHROMA_PORT', 8000)),
+                settings=settings
+            )
+        elif self.mode == 'memory':
+            self.client = chromadb.EphemeralClient(settings=settings)
+        else:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            self.client = chromadb.PersistentClient(path=self.persist_directory, settings=settings)
         
         # Create or get collection for conversations
         self.collection = self.client.get_or_create_collection(
@@ -18,11 +45,33 @@ class RAGManager:
             metadata={"description": "AIDevs conversation history and context"}
         )
         
-        # Create or get collection for users
+        # Legacy user accounts (now in UserStore; kept for migration)
         self.users_collection = self.client.get_or_create_collection(
             name="aidevs_users",
             metadata={"description": "AIDevs user accounts"}
         )
+        
+        # Touch both collections so the on-disk index is loaded before the first request
+        conversations = self.collection.count()
+        users = self.users_collection.count()
+        print(f"✅ ChromaDB ({self.mode}) ready in {time.perf_counter() - start:.2f}s: "
+              f"{users} users, {conversations} interactions")
+        
+        # Write-behind buffer: interactions are embedded and inserted in batches
+        # off the request path by a background writer
+        self.batch_size = int(os.getenv('RAG_WRITE_BATCH_SIZE', 32))
+        self.flush_interval = float(os.getenv('RAG_WRITE_FLUSH_INTERVAL', 1.0))
+        self.max_pending = int(os.getenv('RAG_WRITE_MAX_PENDING', 1000))
+        self._pending = []
+        self._pending_cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        # Sessions with interactions in the batch being written right now
+        self._in_flight = set()
+        self.write_stats = {'queued': 0, 'flushed': 0, 'batches': 0, 'backpressure_waits': 0, 'failed': 0}
+        
+        writer = threading.Thread(target=self._writer_loop, name='rag-writer', daemon=True)
+        writer.start()
+        atexit.register(self.flush)
     
     def store_interaction(self, session_id, agent, message, response, stage):
         """Store conversation interaction in vector database"""
@@ -32,24 +81,89 @@ class RAGManager:
         # Combine message and response for embedding
         combined_text = f"User: {message}\n{agent}: {response}"
         
-        # Store in ChromaDB
-        self.collection.add(
-            documents=[combined_text],
-            metadatas=[{
-                "session_id": session_id,
-                "agent": agent,
-                "stage": stage,
-                "timestamp": datetime.now().isoformat(),
-                "message": message[:500],  # Truncate for metadata
-                "response": response[:500]
-            }],
-            ids=[interaction_id]
-        )
+        record = (interaction_id, combined_text, {
+            "session_id": session_id,
+            "agent": agent,
+            "stage": stage,
+            "timestamp": datetime.now().isoformat(),
+            "message": message[:500],  # Truncate for metadata
+            "response": response[:500]
+        })
+        
+        # Queue for the background writer; block while the buffer is full
+        with self._pending_cond:
+            if len(self._pending) >= self.max_pending:
+                self.write_stats['backpressure_waits'] += 1
+                self._pending_cond.notify_all()
+                while len(self._pending) >= self.max_pending:
+                    self._pending_cond.wait(timeout=self.flush_interval)
+            self._pending.append(record)
+            self.write_stats['queued'] += 1
+            if len(self._pending) >= self.batch_size:
+                self._pending_cond.notify_all()
+    
+    def _writer_loop(self):
+        """Flush queued interactions when a batch fills up or the interval elapses"""
+        while True:
+            with self._pending_cond:
+                self._pending_cond.wait_for(
+                    lambda: len(self._pending) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+            self.flush()
+    
+    def flush(self, session_id=None):
+        """Write every queued interaction in one batched add"""
+        # With session_id, only wait when that session has writes queued or in
+        # flight, so reads see the session's own writes without queueing behind
+        # other sessions' batches
+        if session_id and not self._has_writes(session_id):
+            return
+        with self._flush_lock:
+            with self._pending_cond:
+                if session_id and not self._is_pending(session_id):
+                    return
+                batch, self._pending = self._pending, []
+                self._in_flight = {r[2]['session_id'] for r in batch}
+                self._pending_cond.notify_all()
+            
+            if not batch:
+                return
+            
+            try:
+                offload(
+                    self.collection.add,
+                    ids=[r[0] for r in batch],
+                    documents=[r[1] for r in batch],
+                    metadatas=[r[2] for r in batch]
+                )
+                self.write_stats['flushed'] += len(batch)
+                self.write_stats['batches'] += 1
+            except Exception as e:
+                self.write_stats['failed'] += len(batch)
+                print(f"RAG batch write error ({len(batch)} interactions dropped): {e}")
+            finally:
+                with self._pending_cond:
+                    self._in_flight = set()
+    
+    def _is_pending(self, session_id):
+        """Caller holds _pending_cond"""
+        return any(r[2]['session_id'] == session_id for r in self._pending)
+    
+    def _has_writes(self, session_id):
+        with self._pending_cond:
+            return session_id in self._in_flight or self._is_pending(session_id)
+    
+    def get_write_stats(self):
+        with self._pending_cond:
+            return dict(self.write_stats, pending=len(self._pending))
     
     def retrieve_context(self, query, session_id, n_results=5):
         """Retrieve relevant context from conversation history"""
         try:
-            results = self.collection.query(
+            self.flush(session_id)
+            results = offload(
+                self.collection.query,
                 query_texts=[query],
                 n_results=n_results,
                 where={"session_id": session_id}
@@ -72,6 +186,7 @@ class RAGManager:
     def get_session_history(self, session_id, limit=10):
         """Get full session history"""
         try:
+            self.flush(session_id)
             results = self.collection.get(
                 where={"session_id": session_id},
                 limit=limit
@@ -85,6 +200,15 @@ class RAGManager:
     def clear_session(self, session_id):
         """Clear all data for a session"""
         try:
+            # Drop queued writes and wait for any batch already in flight
+            with self._pending_cond:
+                self._pending = [r for r in self._pending if r[2]['session_id'] != session_id]
+                in_flight = session_id in self._in_flight
+                self._pending_cond.notify_all()
+            if in_flight:
+                with self._flush_lock:
+                    pass
+            
             # Get all IDs for this session
             results = self.collection.get(
                 where={"session_id": session_id}
@@ -99,6 +223,7 @@ class RAGManager:
     def get_latest_code(self, session_id, agent='frontend'):
         """Retrieve latest generated code from specific agent"""
         try:
+            self.flush(session_id)
             results = self.collection.query(
                 query_texts=["code generation"],
                 n_results=1,
@@ -116,37 +241,3 @@ class RAGManager:
         except Exception as e:
             print(f"Error getting latest code: {e}")
             return ""
-    
-    def store_user(self, user_data):
-        """Store user account in ChromaDB"""
-        username = user_data['username']
-        
-        # Store user document
-        self.users_collection.upsert(
-            documents=[f"User: {username}"],
-            metadatas=[user_data],
-            ids=[username]
-        )
-    
-    def get_user(self, username):
-        """Retrieve user by username"""
-        try:
-            results = self.users_collection.get(
-                ids=[username]
-            )
-            
-            if results['metadatas'] and len(results['metadatas']) > 0:
-                return results['metadatas'][0]
-            
-            return None
-        
-        except Exception as e:
-            print(f"Error getting user: {e}")
-            return None
-    
-    def update_last_login(self, username):
-        """Update user's last login timestamp"""
-        user = self.get_user(username)
-        if user:
-            user['last_login'] = datetime.now().isoformat()
-            self.store_user(user)
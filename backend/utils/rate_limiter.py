@@ -0,0 +1,221 @@
+"""Client-side Groq rate limiting: per-key request/token buckets, header sync and retry backoff"""
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+
+DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+class LLMError(Exception):
+    """An LLM call failed in a way retrying won't fix (bad key, rejected request)"""
+
+
+class RateLimitedError(LLMError):
+    def __init__(self, message, retry_after=None):
+        """Out of quota for this key; retry_after is the suggested wait in seconds"""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMUnavailableError(LLMError):
+    """Groq kept failing (5xx, timeouts, dropped connections) until the deadline"""
+
+
+def parse_duration(value):
+    """Groq reset headers look like '2m59.56s', '7.66s' or '120ms'; returns seconds or None"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _header_int(headers, name):
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, capacity, period=60.0):
+        """capacity units per period, refilled continuously"""
+        self.capacity = float(capacity)
+        self.period = period
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def rate(self):
+        return self.capacity / self.period
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until amount is available (a request larger than capacity waits for a full bucket)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def sync(self, remaining, limit=None, lower_only=False):
+        """Adopt the server's remaining quota; lower_only when its window is longer than ours"""
+        if limit and not lower_only:
+            self.capacity = float(limit)
+        self._refill(time.monotonic())
+        remaining = min(float(remaining), self.capacity)
+        self.level = min(self.level, remaining) if lower_only else remaining
+
+
+class _KeyLimits:
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.blocked_until = 0.0
+        self.stats = {'calls': 0, 'waits': 0, 'wait_time': 0.0, 'throttled': 0, 'rejected': 0}
+
+
+class RateLimiter:
+    def __init__(self, rpm=None, tpm=None, max_keys=None):
+        """Per-API-key request and token buckets, kept in step with Groq's rate-limit headers"""
+        self.rpm = rpm or int(os.getenv('GROQ_RPM', 30))
+        self.tpm = tpm or int(os.getenv('GROQ_TPM', 12000))
+        self.max_keys = max_keys or int(os.getenv('GROQ_LIMITER_MAX_KEYS', 1024))
+        # Retry policy for 429/5xx responses
+        self.deadline = float(os.getenv('LLM_DEADLINE', 120))
+        self.max_retries = int(os.getenv('LLM_MAX_RETRIES', 4))
+        self.backoff_base = float(os.getenv('LLM_BACKOFF_BASE', 0.5))
+        self.backoff_max = float(os.getenv('LLM_BACKOFF_MAX', 8))
+
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'acquired': 0, 'waits': 0, 'wait_time': 0.0, 'rejected': 0,
+                      'throttled': 0, 'retries': 0, 'header_syncs': 0}
+
+    def _limits(self, api_key):
+        """Caller holds the lock"""
+        limits = self._keys.get(api_key)
+        if limits is None:
+            limits = self._keys[api_key] = _KeyLimits(self.rpm, self.tpm)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(api_key)
+        return limits
+
+    def acquire(self, api_key, tokens, deadline):
+        """Block until the key has room for one request of ~tokens; RateLimitedError if not before deadline"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                limits = self._limits(api_key)
+                now = time.monotonic()
+                wait = max(
+                    limits.blocked_until - now,
+                    limits.requests.wait_time(1, now),
+                    limits.tokens.wait_time(tokens, now)
+                )
+                if wait <= 0:
+                    limits.requests.take(1)
+                    limits.tokens.take(tokens)
+                    limits.stats['calls'] += 1
+                    self.stats['acquired'] += 1
+                    if waited:
+                        limits.stats['waits'] += 1
+                        limits.stats['wait_time'] += waited
+                        self.stats['waits'] += 1
+                        self.stats['wait_time'] += waited
+                    return waited
+                if now + wait > deadline:
+                    limits.stats['rejected'] += 1
+                    self.stats['rejected'] += 1
+                    raise RateLimitedError(
+                        f"Groq rate limit reached for this API key, try again in {wait:.0f}s",
+                        retry_after=wait
+                    )
+            # Re-check at least every second; a response's headers may refill the buckets
+            pause = min(wait, 1.0)
+            time.sleep(pause)
+            waited += pause
+
+    def observe(self, api_key, status_code, headers):
+        """Sync the key's buckets from a response (httpx hook on the pooled clients)"""
+        remaining_requests = _header_int(headers, 'x-ratelimit-remaining-requests')
+        remaining_tokens = _header_int(headers, 'x-ratelimit-remaining-tokens')
+        retry_after = parse_duration(headers.get('retry-after'))
+        if remaining_requests is None and remaining_tokens is None and status_code != 429:
+            return
+
+        with self._lock:
+            limits = self._limits(api_key)
+            now = time.monotonic()
+            self.stats['header_syncs'] += 1
+            if remaining_requests is not None:
+                # Groq's request quota is per day, so it can only lower our per-minute bucket
+                limits.requests.sync(remaining_requests, lower_only=True)
+                if remaining_requests <= 0:
+                    reset = parse_duration(headers.get('x-ratelimit-reset-requests'))
+                    limits.blocked_until = max(limits.blocked_until, now + (reset or 60))
+            if remaining_tokens is not None:
+                limits.tokens.sync(remaining_tokens, limit=_header_int(headers, 'x-ratelimit-limit-tokens'))
+                if remaining_tokens <= 0:
+                    reset = parse_duration(headers.get('x-ratelimit-reset-tokens'))
+                    limits.blocked_until = max(limits.blocked_until, now + (reset or 60))
+            if status_code == 429:
+                limits.stats['throttled'] += 1
+                self.stats['throttled'] += 1
+                limits.blocked_until = max(limits.blocked_until, now + (retry_after or self.backoff_base))
+
+    def retry_after(self, api_key):
+        """Seconds until a throttled key may be used again (0 if it isn't blocked)"""
+        with self._lock:
+            limits = self._keys.get(api_key)
+            return max(0.0, limits.blocked_until - time.monotonic()) if limits else 0.0
+
+    def backoff(self, attempt, api_key=None):
+        """Full-jitter exponential backoff, never shorter than the key's block"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        with self._lock:
+            self.stats['retries'] += 1
+        if api_key:
+            delay = max(delay, self.retry_after(api_key))
+        return delay
+
+    def key_stats(self, api_key):
+        with self._lock:
+            limits = self._keys.get(api_key)
+            if limits is None:
+                return None
+            now = time.monotonic()
+            limits.requests._refill(now)
+            limits.tokens._refill(now)
+            return dict(
+                limits.stats,
+                wait_time=round(limits.stats['wait_time'], 3),
+                requests_available=int(limits.requests.level),
+                tokens_available=int(limits.tokens.level),
+                blocked_for=round(max(0.0, limits.blocked_until - now), 3)
+            )
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, keys=len(self._keys), rpm=self.rpm, tpm=self.tpm)
+        stats['wait_time'] = round(stats['wait_time'], 3)
+        return stats
+
+
+# Shared by every agent in this process
+rate_limiter = RateLimiter()
@@ -0,0 +1,150 @@
+"""Semantic near-duplicate cache for generated website sections (ChromaDB)"""
+import hashlib
+import os
+import re
+import threading
+from datetime import datetime
+from .concurrency import offload
+
+
+class SectionSemanticCache:
+    def __init__(self, rag_manager, threshold=None, max_entries=None, enabled=None):
+        """Reuse section HTML whose (section, requirements) embedding is close enough, within one design context"""
+        self.threshold = threshold or float(os.getenv('SECTION_CACHE_THRESHOLD', 0.92))
+        self.max_entries = max_entries or int(os.getenv('SECTION_CACHE_MAX_ENTRIES', 2000))
+        if enabled is None:
+            enabled = os.getenv('SECTION_CACHE_ENABLED', 'true').lower() == 'true'
+        self.enabled = enabled
+
+        # Own collection with cosine distance so similarity = 1 - distance
+        self.collection = rag_manager.client.get_or_create_collection(
+            name="aidevs_section_cache",
+            metadata={"description": "Generated sections keyed by normalized brief", "hnsw:space": "cosine"}
+        )
+
+        self._lock = threading.Lock()
+        self._stores_since_evict = 0
+        self.stats = {'lookups': 0, 'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    @staticmethod
+    def normalize(section, requirements):
+        """Lowercase, drop punctuation and collapse whitespace"""
+        text = re.sub(r'[^a-z0-9#\s-]', ' ', requirements.lower())
+        text = re.sub(r'\s+', ' ', text).strip()
+        return f"{section.lower()}: {text}"
+
+    @staticmethod
+    def context_key(context):
+        """Entries only match sections built on the same site/design context"""
+        return hashlib.sha1((context or '').encode('utf-8')).hexdigest()[:16]
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def lookup(self, section, requirements, context=''):
+        """Return cached HTML for a near-duplicate brief on the same context, or None"""
+        if not self.enabled:
+            return None
+
+        self._count('lookups')
+        try:
+            results = offload(
+                self.collection.query,
+                query_texts=[self.normalize(section, requirements)],
+                n_results=1,
+                where={"$and": [{"section": section}, {"context": self.context_key(context)}]}
+            )
+
+            if not results['ids'] or not results['ids'][0]:
+                self._count('misses')
+                return None
+
+            similarity = 1 - results['distances'][0][0]
+            if similarity < self.threshold:
+                self._count('misses')
+                return None
+
+            entry_id = results['ids'][0][0]
+            metadata = results['metadatas'][0][0]
+            offload(
+                self.collection.update,
+                ids=[entry_id],
+                metadatas=[{
+                    **metadata,
+                    "hits": metadata.get('hits', 0) + 1,
+                    "last_used": datetime.now().isoformat()
+                }]
+            )
+            self._count('hits')
+            print(f"⚡ Semantic cache hit for {section} (similarity {similarity:.3f})")
+            return metadata['html']
+
+        except Exception as e:
+            print(f"Section cache lookup error: {e}")
+            self._count('misses')
+            return None
+
+    def store(self, section, requirements, html, context=''):
+        """Remember generated HTML for a brief"""
+        if not self.enabled or not html:
+            return
+
+        normalized = self.normalize(section, requirements)
+        context_key = self.context_key(context)
+        entry_id = hashlib.sha1(f"{context_key}:{normalized}".encode('utf-8')).hexdigest()
+        now = datetime.now().isoformat()
+        try:
+            offload(
+                self.collection.upsert,
+                documents=[normalized],
+                metadatas=[{
+                    "section": section,
+                    "context": context_key,
+                    "html": html,
+                    "hits": 0,
+                    "created": now,
+                    "last_used": now
+                }],
+                ids=[entry_id]
+            )
+        except Exception as e:
+            print(f"Section cache store error: {e}")
+            return
+
+        with self._lock:
+            self.stats['stores'] += 1
+            self._stores_since_evict += 1
+            evict = self._stores_since_evict >= 25
+            if evict:
+                self._stores_since_evict = 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """Drop the least recently used entries beyond max_entries"""
+        try:
+            overflow = offload(self.collection.count) - self.max_entries
+            if overflow <= 0:
+                return
+
+            entries = offload(self.collection.get, include=["metadatas"])
+            ranked = sorted(
+                zip(entries['ids'], entries['metadatas']),
+                key=lambda item: item[1].get('last_used', '')
+            )
+            stale_ids = [entry_id for entry_id, _ in ranked[:overflow]]
+            offload(self.collection.delete, ids=stale_ids)
+
+            with self._lock:
+                self.stats['evictions'] += len(stale_ids)
+        except Exception as e:
+            print(f"Section cache eviction error: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['hit_rate'] = round(stats['hits'] / stats['lookups'], 3) if stats['lookups'] else 0.0
+        stats['threshold'] = self.threshold
+        stats['enabled'] = self.enabled
+        return stats
@@ -0,0 +1,424 @@
+"""Pluggable session stores with per-session versions for optimistic concurrency"""
+import base64
+import itertools
+import json
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+from .sqlite_pool import SQLitePool
+
+
+class SessionConflictError(Exception):
+    """Raised when a session was saved by someone else since it was read"""
+
+
+class SessionStore(ABC):
+    max_retries = 5
+    # Events kept per session for clients that reconnect with Last-Event-ID
+    max_events = 200
+
+    def _init_events(self):
+        # Wakes subscribers in this process; other workers' events show up on the next poll
+        self._events_cond = threading.Condition()
+        self.events_poll_interval = float(os.getenv('EVENTS_POLL_INTERVAL', 0.5))
+
+    @abstractmethod
+    def get(self, session_id):
+        """Return (session, version); (None, 0) if the session does not exist"""
+
+    @abstractmethod
+    def save(self, session_id, session, expected_version):
+        """Write the session if its version is still expected_version; returns the new version"""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Remove the session and its event log"""
+
+    @abstractmethod
+    def session_ids(self):
+        """Every stored session id"""
+
+    @abstractmethod
+    def get_stats(self):
+        """Per-session size accounting for the admin endpoint"""
+
+    def update(self, session_id, mutate, create=None):
+        """Read-modify-write with retries on version conflicts; returns the saved session
+
+        mutate may return False to leave the session as it is (update then returns None).
+        """
+        for _ in range(self.max_retries):
+            session, version = self.get(session_id)
+            if session is None:
+                if create is None:
+                    return None
+                session = create()
+            if mutate(session) is False:
+                return None
+            try:
+                self.save(session_id, session, version)
+                return session
+            except SessionConflictError:
+                continue
+        raise SessionConflictError(f"Session {session_id} kept changing, gave up after {self.max_retries} tries")
+
+    def publish(self, session_id, event, data):
+        """Append an event to the session's log; returns its id"""
+        event_id = self._append_event(session_id, event, data)
+        with self._events_cond:
+            self._events_cond.notify_all()
+        return event_id
+
+    @abstractmethod
+    def _append_event(self, session_id, event, data):
+        """Store one event and return its id"""
+
+    @abstractmethod
+    def events_since(self, session_id, after_id):
+        """[(id, event, data)] logged after after_id, oldest first"""
+
+    @abstractmethod
+    def latest_event_id(self, session_id):
+        """Id of the session's newest event; 0 if it has none"""
+
+    def wait_for_events(self, session_id, after_id, timeout):
+        """Block until the session has events after after_id or timeout passes"""
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self.events_since(session_id, after_id)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            with self._events_cond:
+                self._events_cond.wait(min(self.events_poll_interval, remaining))
+
+
+class InMemorySessionStore(SessionStore):
+    def __init__(self, encode=None, decode=None, budget_bytes=None, idle_ttl=None, spill_dir=None):
+        """Per-process sessions, bounded by a byte budget; cold sessions spill to disk
+        
+        Sessions are held as encoded JSON, so get() hands out a private copy and
+        nothing reaches the store except through save().
+        """
+        self.encode = encode or (lambda session: session)
+        self.decode = decode or (lambda data: data)
+        self.budget_bytes = budget_bytes or int(os.getenv('SESSION_MEMORY_BUDGET_MB', 256)) * 1024 * 1024
+        self.idle_ttl = idle_ttl or float(os.getenv('SESSION_IDLE_TTL', 1800))
+        self.spill_dir = spill_dir or os.getenv('SESSION_SPILL_DIR', './session_spill')
+        os.makedirs(self.spill_dir, exist_ok=True)
+
+        # session_id -> [payload JSON, version, last_access, size_bytes], least recently used first
+        self._sessions = OrderedDict()
+        self._total_bytes = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.RLock()
+        self.stats = {'spills': 0, 'restores': 0}
+
+        self._events = {}
+        self._event_ids = itertools.count(1)
+        self._init_events()
+
+    def _dumps(self, session):
+        return json.dumps(self.encode(session), separators=(',', ':'))
+
+    def _spill_path(self, session_id):
+        name = base64.urlsafe_b64encode(session_id.encode('utf-8')).decode('ascii')
+        return os.path.join(self.spill_dir, f"{name}.json.z")
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                entry = self._restore(session_id)
+                if entry is None:
+                    return None, 0
+            entry[2] = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            payload, version = entry[0], entry[1]
+        return self.decode(json.loads(payload)), version
+
+    def save(self, session_id, session, expected_version):
+        payload = self._dumps(session)
+        with self._lock:
+            entry = self._sessions.get(session_id) or self._restore(session_id)
+            version = entry[1] if entry else 0
+            if version != expected_version:
+                raise SessionConflictError(f"Session {session_id} is at version {version}, expected {expected_version}")
+
+            size = len(payload)
+            if entry:
+                self._total_bytes -= entry[3]
+            self._sessions[session_id] = [payload, version + 1, time.monotonic(), size]
+            self._sessions.move_to_end(session_id)
+            self._total_bytes += size
+            self._enforce_limits(keep=session_id)
+            return version + 1
+
+    def delete(self, session_id):
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry:
+                self._total_bytes -= entry[3]
+            self._events.pop(session_id, None)
+            try:
+                os.remove(self._spill_path(session_id))
+            except OSError:
+                pass
+
+    def _append_event(self, session_id, event, data):
+        with self._lock:
+            event_id = next(self._event_ids)
+            log = self._events.setdefault(session_id, deque(maxlen=self.max_events))
+            log.append((event_id, event, data))
+            return event_id
+
+    def events_since(self, session_id, after_id):
+        with self._lock:
+            return [entry for entry in self._events.get(session_id, ()) if entry[0] > after_id]
+
+    def latest_event_id(self, session_id):
+        with self._lock:
+            log = self._events.get(session_id)
+            return log[-1][0] if log else 0
+
+    def session_ids(self):
+        with self._lock:
+            return list(self._sessions) + [session_id for session_id, _ in self._spilled()]
+
+    def _enforce_limits(self, keep=None):
+        """Spill idle sessions, then the least recently used until under budget"""
+        now = time.monotonic()
+        if now - self._last_sweep >= 30:
+            self._last_sweep = now
+            for session_id, entry in list(self._sessions.items()):
+                if session_id != keep and now - entry[2] > self.idle_ttl:
+                    self._spill(session_id)
+
+        while self._total_bytes > self.budget_bytes:
+            session_id = next((sid for sid in self._sessions if sid != keep), None)
+            if session_id is None:
+                break
+            self._spill(session_id)
+
+    def _spill(self, session_id):
+        payload, version, _, size = self._sessions.pop(session_id)
+        self._total_bytes -= size
+        spilled = json.dumps({'version': version, 'data': payload}, separators=(',', ':'))
+        path = self._spill_path(session_id)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(zlib.compress(spilled.encode('utf-8'), 6))
+        os.replace(f"{path}.tmp", path)
+        self.stats['spills'] += 1
+
+    def _restore(self, session_id):
+        """Load a spilled session back into memory"""
+        path = self._spill_path(session_id)
+        try:
+            with open(path, 'rb') as f:
+                spilled = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except FileNotFoundError:
+            return None
+        os.remove(path)
+
+        entry = [spilled['data'], spilled['version'], time.monotonic(), len(spilled['data'])]
+        self._sessions[session_id] = entry
+        self._total_bytes += entry[3]
+        self.stats['restores'] += 1
+        self._enforce_limits(keep=session_id)
+        return entry
+
+    def _spilled(self):
+        for name in os.listdir(self.spill_dir):
+            if name.endswith('.json.z'):
+                session_id = base64.urlsafe_b64decode(name[:-len('.json.z')]).decode('utf-8')
+                yield session_id, os.path.getsize(os.path.join(self.spill_dir, name))
+
+    def get_stats(self):
+        """Per-session size accounting for the admin endpoint"""
+        now = time.monotonic()
+        with self._lock:
+            sessions = [{
+                'session_id': session_id,
+                'location': 'memory',
+                'bytes': entry[3],
+                'version': entry[1],
+                'idle_seconds': round(now - entry[2], 1)
+            } for session_id, entry in self._sessions.items()]
+            sessions += [{
+                'session_id': session_id,
+                'location': 'disk',
+                'bytes': size
+            } for session_id, size in self._spilled()]
+            return {
+                'backend': 'memory',
+                'memory_bytes': self._total_bytes,
+                'budget_bytes': self.budget_bytes,
+                'idle_ttl': self.idle_ttl,
+                'spills': self.stats['spills'],
+                'restores': self.stats['restores'],
+                'sessions': sessions
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, db_path=None, encode=None, decode=None, expire_seconds=None):
+        """Sessions shared by every worker on the box, stored as compressed JSON"""
+        self.db_path = db_path or os.getenv('SESSION_DB_PATH', './sessions.db')
+        # encode/decode convert live objects (e.g. LeadAgent) to and from plain JSON data
+        self.encode = encode or (lambda session: session)
+        self.decode = decode or (lambda data: data)
+        # Sessions not written for this long are deleted, events and all
+        self.expire_seconds = expire_seconds or float(os.getenv('SESSION_EXPIRE_SECONDS', 7 * 24 * 3600))
+        self._last_sweep = 0.0
+        self.pool_size = int(os.getenv('SESSION_DB_POOL_SIZE', 4))
+        self.db = SQLitePool(self.db_path, self.pool_size)
+
+        with self.db.connection() as conn:
+            self._create_tables(conn)
+        self._init_events()
+
+    def _create_tables(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                data BLOB NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS session_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_session_events ON session_events (session_id, id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions (updated_at)")
+
+    def _dumps(self, session):
+        payload = json.dumps(self.encode(session), separators=(',', ':'))
+        return zlib.compress(payload.encode('utf-8'), 6)
+
+    def _loads(self, blob):
+        return self.decode(json.loads(zlib.decompress(blob).decode('utf-8')))
+
+    def get(self, session_id):
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT data, version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None, 0
+        return self._loads(row[0]), row[1]
+
+    def save(self, session_id, session, expected_version):
+        blob = self._dumps(session)
+        now = datetime.now().isoformat()
+        with self.db.connection() as conn:
+            if expected_version == 0:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO sessions (session_id, version, data, updated_at) VALUES (?, 1, ?, ?)",
+                    (session_id, blob, now)
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE sessions SET version = version + 1, data = ?, updated_at = ? WHERE session_id = ? AND version = ?",
+                    (blob, now, session_id, expected_version)
+                )
+        if cursor.rowcount != 1:
+            raise SessionConflictError(f"Session {session_id} changed since version {expected_version}")
+        self._expire_idle()
+        return expected_version + 1
+
+    def _expire_idle(self):
+        """Delete sessions idle past expire_seconds; sweeps at most once a minute"""
+        now = time.monotonic()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        cutoff = (datetime.now() - timedelta(seconds=self.expire_seconds)).isoformat()
+        with self.db.connection() as conn:
+            idle = [row[0] for row in conn.execute("SELECT session_id FROM sessions WHERE updated_at < ?", (cutoff,))]
+            expired = 0
+            for session_id in idle:
+                # Re-checked per row so a session saved since the SELECT survives
+                cursor = conn.execute("DELETE FROM sessions WHERE session_id = ? AND updated_at < ?", (session_id, cutoff))
+                if cursor.rowcount:
+                    conn.execute("DELETE FROM session_events WHERE session_id = ?", (session_id,))
+                    expired += 1
+        if expired:
+            print(f"🧹 Expired {expired} idle session(s)")
+
+    def delete(self, session_id):
+        with self.db.connection() as conn:
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM session_events WHERE session_id = ?", (session_id,))
+
+    def session_ids(self):
+        with self.db.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT session_id FROM sessions")]
+
+    def _append_event(self, session_id, event, data):
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO session_events (session_id, event, data, created_at) VALUES (?, ?, ?, ?)",
+                (session_id, event, json.dumps(data), datetime.now().isoformat())
+            )
+            event_id = cursor.lastrowid
+            conn.execute(
+                "DELETE FROM session_events WHERE session_id = ? AND id < ("
+                "SELECT id FROM session_events WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_id, session_id, self.max_events - 1)
+            )
+        return event_id
+
+    def events_since(self, session_id, after_id):
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT id, event, data FROM session_events WHERE session_id = ? AND id > ? ORDER BY id",
+                (session_id, after_id)
+            ).fetchall()
+        return [(row[0], row[1], json.loads(row[2])) for row in rows]
+
+    def latest_event_id(self, session_id):
+        with self.db.connection() as conn:
+            row = conn.execute(
+                "SELECT MAX(id) FROM session_events WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] or 0
+
+    def get_stats(self):
+        with self.db.connection() as conn:
+            rows = conn.execute(
+                "SELECT session_id, version, length(data), updated_at FROM sessions ORDER BY updated_at DESC"
+            ).fetchall()
+        return {
+            'backend': 'sqlite',
+            'stored_bytes': sum(row[2] for row in rows),
+            'expire_seconds': self.expire_seconds,
+            'sessions': [{
+                'session_id': row[0],
+                'location': 'disk',
+                'version': row[1],
+                'bytes': row[2],
+                'updated_at': row[3]
+            } for row in rows]
+        }
+
+
+def create_session_store(encode=None, decode=None):
+    """Build the store selected by SESSION_STORE (sqlite or memory)"""
+    backend = os.getenv('SESSION_STORE', 'sqlite')
+    if backend == 'memory':
+        return InMemorySessionStore(encode=encode, decode=decode)
+    if backend == 'sqlite':
+        return SQLiteSessionStore(encode=encode, decode=decode)
+    raise ValueError(f"Unknown SESSION_STORE '{backend}'")
@@ -0,0 +1,49 @@
+"""Collapse identical concurrent calls into one execution"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        """The first caller for a key runs fn; callers arriving meanwhile wait and share its outcome"""
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {'executions': 0, 'coalesced': 0, 'in_flight': 0}
+
+    def do(self, key, fn):
+        """Returns (result, shared); shared is True for callers that didn't run fn. Errors are re-raised to all"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats['executions'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats, in_flight=len(self._calls))
@@ -0,0 +1,32 @@
+"""Bounded pool of shared SQLite connections (WAL, autocommit)"""
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+
+class SQLitePool:
+    def __init__(self, db_path, size, row_factory=None):
+        """Open size connections up front; callers borrow them with connection()"""
+        self.db_path = db_path
+        self.size = size
+        self.row_factory = row_factory
+        self._pool = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._pool.put(self._open())
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        if self.row_factory:
+            conn.row_factory = self.row_factory
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection (autocommit mode); bounded however many greenlets ask"""
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
@@ -0,0 +1,85 @@
+"""Small task-graph executor for running dependent agent steps concurrently"""
+import time
+from collections import OrderedDict
+from concurrent.futures import wait, FIRST_COMPLETED
+
+
+class TaskGraph:
+    def __init__(self, name="graph"):
+        """Declare nodes with add(), then run() them on an executor"""
+        self.name = name
+        self.nodes = OrderedDict()
+        self.timings = {}
+        self.errors = {}
+        self.wall_time = 0.0
+
+    def add(self, name, fn, deps=()):
+        """Add a node; fn is called with the results of its deps as keyword arguments"""
+        if name in self.nodes:
+            raise ValueError(f"Duplicate task '{name}'")
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"Task '{name}' depends on unknown task '{dep}'")
+        self.nodes[name] = (fn, tuple(deps))
+        return self
+
+    def run(self, executor):
+        """Run every node as soon as its deps finish; returns {name: result}"""
+        results = {}
+        pending = OrderedDict(self.nodes)
+        running = {}
+        graph_start = time.perf_counter()
+
+        while pending or running:
+            # Submit every node whose dependencies are satisfied
+            for name, (fn, deps) in list(pending.items()):
+                failed = [d for d in deps if d in self.errors]
+                if failed:
+                    del pending[name]
+                    self.errors[name] = RuntimeError(f"Skipped: dependency {failed[0]} failed")
+                    self.timings[name] = {'status': 'skipped', 'start': None, 'duration': 0.0}
+                    continue
+                if all(d in results for d in deps):
+                    del pending[name]
+                    inputs = {d: results[d] for d in deps}
+                    future = executor.submit(self._run_node, name, fn, inputs, graph_start)
+                    running[future] = name
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    self.errors[name] = e
+                    print(f"❌ Task '{name}' failed: {e}")
+
+        self.wall_time = time.perf_counter() - graph_start
+        return results
+
+    def _run_node(self, name, fn, inputs, graph_start):
+        start = time.perf_counter()
+        status = 'failed'
+        try:
+            result = fn(**inputs)
+            status = 'done'
+            return result
+        finally:
+            self.timings[name] = {
+                'status': status,
+                'start': round(start - graph_start, 3),
+                'duration': round(time.perf_counter() - start, 3)
+            }
+
+    def summary(self):
+        """Timing report for logging and status endpoints"""
+        serial_time = sum(t['duration'] for t in self.timings.values())
+        return {
+            'graph': self.name,
+            'wall_time': round(self.wall_time, 3),
+            'serial_time': round(serial_time, 3),
+            'nodes': dict(self.timings)
+        }
@@ -0,0 +1,96 @@
+"""User account store backed by SQLite (WAL mode)"""
+import os
+import sqlite3
+from datetime import datetime
+
+from .sqlite_pool import SQLitePool
+
+USER_FIELDS = (
+    'username', 'first_name', 'middle_name', 'last_name',
+    'password_hash', 'api_key_encrypted', 'registered_at', 'last_login'
+)
+
+
+class UserStore:
+    def __init__(self, db_path=None, pool_size=None):
+        """Indexed user table with a small pool of shared connections"""
+        self.db_path = db_path or os.getenv('USERS_DB_PATH', './users.db')
+        self.pool_size = pool_size or int(os.getenv('USERS_DB_POOL_SIZE', 4))
+        self.db = SQLitePool(self.db_path, self.pool_size, row_factory=sqlite3.Row)
+
+        with self.db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    username TEXT NOT NULL,
+                    first_name TEXT NOT NULL,
+                    middle_name TEXT NOT NULL DEFAULT '',
+                    last_name TEXT NOT NULL,
+                    password_hash TEXT NOT NULL,
+                    api_key_encrypted TEXT NOT NULL,
+                    registered_at TEXT NOT NULL,
+                    last_login TEXT,
+                    -- Bumped on every key change so each worker's key cache can spot stale entries
+                    api_key_version INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users (username)")
+
+    def create_user(self, user_data):
+        """Insert the user unless the username is taken; returns True if inserted"""
+        row = tuple(user_data.get(field, '') for field in USER_FIELDS)
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                f"INSERT OR IGNORE INTO users ({', '.join(USER_FIELDS)}) "
+                f"VALUES ({', '.join('?' for _ in USER_FIELDS)})",
+                row
+            )
+            return cursor.rowcount == 1
+
+    def get_user(self, username):
+        """Retrieve user by username"""
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
+        return dict(row) if row else None
+
+    def update_last_login(self, username):
+        """Update user's last login timestamp"""
+        with self.db.connection() as conn:
+            conn.execute(
+                "UPDATE users SET last_login = ? WHERE username = ?",
+                (datetime.now().isoformat(), username)
+            )
+
+    def update_api_key(self, username, api_key_encrypted):
+        """Replace a user's encrypted API key; returns True if the user exists"""
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE users SET api_key_encrypted = ?, api_key_version = api_key_version + 1 WHERE username = ?",
+                (api_key_encrypted, username)
+            )
+            return cursor.rowcount == 1
+
+    def get_api_key_version(self, username):
+        """Current api_key_version for a user, or None if there is no such user"""
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT api_key_version FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def list_users(self):
+        with self.db.connection() as conn:
+            rows = conn.execute("SELECT * FROM users ORDER BY registered_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self.db.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def migrate_from_collection(self, users_collection):
+        """Copy accounts from the legacy ChromaDB users collection; returns (migrated, skipped)"""
+        results = users_collection.get()
+        migrated = skipped = 0
+        for metadata in results.get('metadatas') or []:
+            if metadata and metadata.get('username') and self.create_user(metadata):
+                migrated += 1
+            else:
+                skipped += 1
+        return migrated, skipped
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import "./ChatbotPage.css";
 import ChatPanel from "./ChatPanel";
@@ -13,6 +13,10 @@ function ChatbotPage() {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
   const [downloadReady, setDownloadReady] = useState(false);
   const [backendReady, setBackendReady] = useState(false);
+  // Last preview we rendered, so unchanged previews are never re-fetched
+  const previewVersion = useRef(0);
+  const previewEtag = useRef(null);
+  const requestedVersion = useRef(0);
 
   // Check authentication on mount
   useEffect(() => {
@@ -40,6 +44,46 @@ function ChatbotPage() {
     ]);
   }, [isAuthenticated]);
 
+  // Server push: sections and build progress arrive the moment they're stored
+  useEffect(() => {
+    if (!isAuthenticated) return;
+
+    const token = localStorage.getItem("aidevs_token");
+    const events = new EventSource(
+      `${API_URL}/api/events?jwt=${encodeURIComponent(token)}`
+    );
+
+    // Sync once per (re)connect in case something finished while disconnected
+    events.onopen = async () => {
+      const status = await checkStatus();
+      if (status && status.preview_version) {
+        fetchPreview(status.preview_version);
+      }
+    };
+
+    events.addEventListener("section_stored", (e) => {
+      fetchPreview(JSON.parse(e.data).preview_version);
+    });
+    events.addEventListener("backend_ready", () => setBackendReady(true));
+    events.addEventListener("download_ready", () => {
+      setBackendReady(true);
+      setDownloadReady(true);
+    });
+    events.addEventListener("build_failed", (e) => {
+      const { error } = JSON.parse(e.data);
+      setMessages((prev) => [
+        ...prev,
+        {
+          role: "assistant",
+          content: `⚠️ **Note:** There was an issue generating the backend (${error}). The frontend is ready, but please try again for the complete package.`,
+          timestamp: new Date(),
+        },
+      ]);
+    });
+
+    return () => events.close();
+  }, [isAuthenticated]);
+
   const sendMessage = async (userMessage) => {
     // Add user message to chat
     const newUserMessage = {
@@ -58,17 +102,27 @@ function ChatbotPage() {
         return;
       }
 
-      // Send to backend with JWT
-      const response = await fetch(`${API_URL}/api/chat`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
-        },
-        body: JSON.stringify({
-          message: userMessage,
-        }),
-      });
+      // Send to backend with JWT. The idempotency key makes the retry after a
+      // dropped connection safe: the server replays the turn instead of rerunning it
+      const idempotencyKey = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+      const send = () =>
+        fetch(`${API_URL}/api/chat`, {
+          method: "POST",
+          headers: {
+            "Content-Type": "application/json",
+            Authorization: `Bearer ${token}`,
+            "Idempotency-Key": idempotencyKey,
+          },
+          body: JSON.stringify({
+            message: userMessage,
+          }),
+        });
+      let response;
+      try {
+        response = await send();
+      } catch (networkError) {
+        response = await send();
+      }
 
       const data = await response.json();
 
@@ -87,10 +141,23 @@ function ChatbotPage() {
 
         setMessages((prev) => [...prev, assistantMessage]);
 
-        // Update preview if code was generated
+        // Update preview only if a section actually changed (usually already
+        // pushed via section_stored); build progress arrives on /api/events
         if (data.has_preview) {
-          fetchPreview();
+          fetchPreview(data.preview_version);
         }
+      } else if (response.status === 409 || response.status === 429 || response.status === 503) {
+        // Raced another message, rate limited or Groq unavailable: nothing was
+        // saved, so the user can just resend
+        const wait = data.retry_after ? ` in about ${data.retry_after}s` : " in a moment";
+        setMessages((prev) => [
+          ...prev,
+          {
+            role: "assistant",
+            content: `⏳ ${data.error}. Please send your message again${wait}.`,
+            timestamp: new Date(),
+          },
+        ]);
       } else {
         throw new Error(data.error);
       }
@@ -108,31 +175,44 @@ function ChatbotPage() {
     }
   };
 
-  const fetchPreview = async () => {
+  const fetchPreview = async (version) => {
+    // Skip versions we already have or are already fetching
+    if (version !== undefined && version <= requestedVersion.current) {
+      return;
+    }
+    if (version !== undefined) {
+      requestedVersion.current = version;
+    }
+
     try {
       const token = localStorage.getItem("aidevs_token");
 
+      const headers = { Authorization: `Bearer ${token}` };
+      if (previewEtag.current) {
+        headers["If-None-Match"] = previewEtag.current;
+      }
+
       const response = await fetch(`${API_URL}/api/preview`, {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
-        },
-        body: JSON.stringify({}),
+        method: "GET",
+        headers,
       });
 
-      const data = await response.json();
-      if (data.success) {
-        setPreviewCode({
-          html: data.html,
-          css: data.css,
-          js: data.js,
-        });
+      // 304: the preview we already have is current
+      if (response.status !== 304) {
+        const data = await response.json();
+        if (data.success) {
+          previewVersion.current = data.version;
+          previewEtag.current = response.headers.get("ETag");
+          setPreviewCode({
+            html: data.html,
+            css: data.css,
+            js: data.js,
+          });
+        }
       }
-
-      // Also check status after fetching preview
-      checkStatus();
     } catch (error) {
+      // Let the next event or chat turn retry this version
+      requestedVersion.current = previewVersion.current;
       console.error("Preview fetch error:", error);
     }
   };
@@ -155,6 +235,7 @@ function ChatbotPage() {
         setBackendReady(data.backend_ready);
         setDownloadReady(data.download_ready);
       }
+      return data;
     } catch (error) {
       console.error("Status check error:", error);
     }
@@ -182,13 +263,12 @@ function ChatbotPage() {
       const token = localStorage.getItem("aidevs_token");
       const username = localStorage.getItem("aidevs_username");
 
+      // GET so the browser cache can revalidate the zip with its ETag
       const response = await fetch(`${API_URL}/api/download`, {
-        method: "POST",
+        method: "GET",
         headers: {
-          "Content-Type": "application/json",
           Authorization: `Bearer ${token}`,
         },
-        body: JSON.stringify({}),
       });
 
       if (response.ok) {
@@ -252,6 +332,11 @@ function ChatbotPage() {
         },
       ]);
       setPreviewCode({ html: "", css: "", js: "" });
+      previewVersion.current = 0;
+      previewEtag.current = null;
+      requestedVersion.current = 0;
+      setBackendReady(false);
+      setDownloadReady(false);
     } catch (error) {
       console.error("Reset error:", error);
     }